@@ -9,6 +9,8 @@ from starlette.staticfiles import StaticFiles
 
 from app.api.v1.utils import refresh_api_list
 from app.core.exceptions import SettingNotFound
+from app.core.execution_engine import execution_engine
+from app.core.http_client import doctor_http_client
 from app.core.init_app import (
     init_menus,
     init_users,
@@ -18,9 +20,15 @@ from app.core.init_app import (
     register_exceptions,
     register_routers,
 )
+from app.core.log_partition import log_partition_manager
+from app.core.log_writer import log_writer
+from app.core.rate_limiter import rate_limiter
+from app.core.route_cache import route_cache
 from app.log import log
-from app.models.system import Log
 from app.models.system import LogType, LogDetailType
+from app.services import doctor_token_provider
+from app.utils.route_matcher import route_matcher
+from app.utils.security import password_hasher
 
 try:
     from app.settings import APP_SETTINGS
@@ -61,17 +69,31 @@ async def lifespan(_app: FastAPI):
     start_time = datetime.now()
     try:
         await modify_db()
+        if APP_SETTINGS.LOG_PARTITION_ENABLED:
+            await log_partition_manager.start()
         await init_menus()
+        await route_cache.invalidate()  # 菜单可能随版本更新而变化
         await refresh_api_list()
+        route_matcher.reload(_app.routes)
         await init_users()
-        await Log.create(log_type=LogType.SystemLog, log_detail_type=LogDetailType.SystemStart)
+        await log_writer.start()
+        log_writer.put_log(log_type=LogType.SystemLog, log_detail_type=LogDetailType.SystemStart)
+        await execution_engine.start()
         yield
 
     finally:
         end_time = datetime.now()
         runtime = (end_time - start_time).total_seconds() / 60
         log.info(f"App {_app.title} runtime: {runtime} min")  # noqa
-        await Log.create(log_type=LogType.SystemLog, log_detail_type=LogDetailType.SystemStop)
+        await execution_engine.stop()
+        await doctor_token_provider.close()
+        await doctor_http_client.close()
+        log_writer.put_log(log_type=LogType.SystemLog, log_detail_type=LogDetailType.SystemStop)
+        await log_writer.stop()  # 写入队列中剩余的日志
+        await log_partition_manager.stop()
+        password_hasher.shutdown()
+        await rate_limiter.close()
+        await route_cache.close()
 
 
 app = create_app()
@@ -1,3 +1,4 @@
+from .registry import *
 from .symptom_analyzer import *
 from .patient_dialog import *
 from .result_analyzer import *
@@ -11,12 +11,13 @@ from datetime import datetime
 from typing import Dict, Any
 from loguru import logger
 
-from app.models.system import Agent
+from app.core.provider_limiter import PROVIDER_DOCTOR, PROVIDER_LLM, provider_limiter
 from app.models.medical import (
     Disease, TestExecution, ExecutionStep, Conversation,
     ExecutionStatus, StepStatus
 )
-from app.services import DoctorService
+from app.services import CampaignService, DoctorService
+from .registry import agent_registry
 from .symptom_analyzer import SymptomAnalyzerAgent
 from .patient_dialog import PatientDialogAgent
 from .result_analyzer import ResultAnalyzerAgent
@@ -32,22 +33,37 @@ class MasterAgent:
         self.result_agent = None
     
     async def initialize(self):
-        """初始化所有子Agent"""
-        # 加载Agent配置
-        symptom_agent_config = await Agent.get(name="症状分析Agent")
-        patient_agent_config = await Agent.get(name="患者对话Agent")
-        result_agent_config = await Agent.get(name="结果判断Agent")
-        
-        # 初始化子Agent
-        self.symptom_agent = SymptomAnalyzerAgent(symptom_agent_config)
-        self.patient_agent = PatientDialogAgent(patient_agent_config)
-        self.result_agent = ResultAnalyzerAgent(result_agent_config)
+        """初始化所有子Agent, 子Agent实例由注册表复用"""
+        self.symptom_agent = await agent_registry.get("症状分析Agent", SymptomAnalyzerAgent)
+        self.patient_agent = await agent_registry.get("患者对话Agent", PatientDialogAgent)
+        self.result_agent = await agent_registry.get("结果判断Agent", ResultAnalyzerAgent)
         
         logger.info("主控Agent初始化完成")
     
+    @staticmethod
+    async def create_execution(disease_id: int, max_rounds: int = 10, status: ExecutionStatus = ExecutionStatus.PENDING) -> TestExecution:
+        """
+        创建测试执行记录, PENDING状态的记录由执行引擎领取后运行
+        
+        Args:
+            disease_id: 疾病ID
+            max_rounds: 最大对话轮次
+            status: 初始状态, 直接运行时为RUNNING, 避免被执行引擎领取
+            
+        Returns:
+            测试执行记录
+        """
+        return await TestExecution.create(
+            execution_id=f"test_{uuid.uuid4().hex[:12]}",
+            disease_id=disease_id,
+            status=status,
+            start_time=datetime.now() if status == ExecutionStatus.RUNNING else None,
+            max_rounds=max_rounds
+        )
+    
     async def run_test(self, disease_id: int, max_rounds: int = 10) -> str:
         """
-        运行完整的测试流程
+        在当前协程中运行完整的测试流程
         
         Args:
             disease_id: 疾病ID
@@ -56,16 +72,21 @@ class MasterAgent:
         Returns:
             执行ID
         """
-        # 创建测试执行记录
-        execution_id = f"test_{uuid.uuid4().hex[:12]}"
-        disease = await Disease.get(id=disease_id)
+        execution = await self.create_execution(disease_id, max_rounds, status=ExecutionStatus.RUNNING)
+        await self.run_execution(execution)
+        return execution.execution_id
+    
+    async def run_execution(self, execution: TestExecution) -> None:
+        """
+        运行已处于RUNNING状态的测试执行, 完成后更新为SUCCESS/ERROR
         
-        execution = await TestExecution.create(
-            execution_id=execution_id,
-            disease=disease,
-            status=ExecutionStatus.RUNNING,
-            start_time=datetime.now()
-        )
+        Args:
+            execution: 测试执行记录
+        """
+        execution_id = execution.execution_id
+        disease_id = execution.disease_id
+        max_rounds = execution.max_rounds
+        disease = await Disease.get(id=disease_id)
         
         logger.info(f"开始测试执行: {execution_id}, 疾病: {disease.name}")
         
@@ -96,7 +117,7 @@ class MasterAgent:
             ).order_by('-round').first()
             
             if last_conversation:
-                await self._execute_step(
+                execution.result = await self._execute_step(
                     execution,
                     "result_analysis",
                     self._run_result_analysis,
@@ -104,22 +125,16 @@ class MasterAgent:
                     disease.name
                 )
             
-            # 更新执行状态为成功
-            execution.status = ExecutionStatus.SUCCESS
-            execution.end_time = datetime.now()
-            await execution.save()
-            
-            logger.info(f"测试执行完成: {execution_id}")
+            # 更新执行状态为成功, 已被超时清理标记为ERROR时不再覆盖
+            if await CampaignService.finish_execution(execution, ExecutionStatus.SUCCESS):
+                logger.info(f"测试执行完成: {execution_id}")
+            else:
+                logger.warning(f"测试执行已被标记结束, 不再更新状态: {execution_id}")
             
         except Exception as e:
             logger.error(f"测试执行失败: {e}")
-            execution.status = ExecutionStatus.ERROR
-            execution.error_message = str(e)
-            execution.end_time = datetime.now()
-            await execution.save()
+            await CampaignService.finish_execution(execution, ExecutionStatus.ERROR, str(e))
             raise
-        
-        return execution_id
     
     async def _execute_step(
         self,
@@ -177,7 +192,8 @@ class MasterAgent:
     
     async def _run_symptom_analysis(self, disease_id: int) -> Dict[str, Any]:
         """运行症状分析"""
-        return await self.symptom_agent.analyze(disease_id)
+        async with provider_limiter.limit(PROVIDER_LLM):
+            return await self.symptom_agent.analyze(disease_id)
     
     async def _run_patient_dialog(
         self,
@@ -209,10 +225,11 @@ class MasterAgent:
                     break
                 
                 # 患者根据画像回答
-                patient_message = await self.patient_agent.respond(
-                    patient_profile,
-                    last_doctor_msg.message
-                )
+                async with provider_limiter.limit(PROVIDER_LLM):
+                    patient_message = await self.patient_agent.respond(
+                        patient_profile,
+                        last_doctor_msg.message
+                    )
             
             # 记录患者消息
             await Conversation.create(
@@ -223,11 +240,12 @@ class MasterAgent:
             )
             
             # 调用医生API获取回复
-            doctor_response = await DoctorService.chat(
-                session_id=session_id,
-                message=patient_message,
-                patient_info=patient_profile if round_num == 1 else None
-            )
+            async with provider_limiter.limit(PROVIDER_DOCTOR):
+                doctor_response = await DoctorService.chat(
+                    session_id=session_id,
+                    message=patient_message,
+                    patient_info=patient_profile if round_num == 1 else None
+                )
             
             # 记录医生消息
             await Conversation.create(
@@ -250,7 +268,8 @@ class MasterAgent:
         expected_disease: str
     ) -> Dict[str, Any]:
         """运行结果分析"""
-        return await self.result_agent.analyze(doctor_response, expected_disease)
+        async with provider_limiter.limit(PROVIDER_LLM):
+            return await self.result_agent.analyze(doctor_response, expected_disease)
 
 
 __all__ = ["MasterAgent"]
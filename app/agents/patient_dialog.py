@@ -38,6 +38,9 @@ class PatientDialogAgent:
         self.prompt = ChatPromptTemplate.from_template(
             agent.prompt_template or self._default_prompt()
         )
+        
+        # LangChain链, 构建一次后复用
+        self.chain = self.prompt | self.llm
     
     def _default_prompt(self) -> str:
         """默认提示词模板"""
@@ -67,11 +70,8 @@ class PatientDialogAgent:
         """
         logger.info(f"患者Agent收到医生问题: {doctor_question}")
         
-        # 构建LangChain链
-        chain = self.prompt | self.llm
-        
         try:
-            result = await chain.ainvoke({
+            result = await self.chain.ainvoke({
                 "patient_profile": json.dumps(patient_profile, ensure_ascii=False, indent=2),
                 "doctor_question": doctor_question
             })
@@ -0,0 +1,73 @@
+"""
+FileName : registry.py
+Desc :   子Agent实例注册表
+"""
+
+import time
+from typing import Any, TypeVar
+
+from loguru import logger
+
+from app.models.system import Agent
+from app.settings import APP_SETTINGS
+
+T = TypeVar("T")
+
+
+class AgentRegistry:
+    """
+    进程内共享的子Agent实例
+    每个Agent配置(id + version + 更新时间)只构建一次LLM客户端、Prompt和chain, 所有测试执行共用
+    /system-manage/agents 写入时调用invalidate清空, TTL到期后重新查询配置, 未变化时继续使用原实例
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, tuple[Any, ...], Any]] = {}
+        self._generation = 0
+
+        self.hits = 0
+        self.reloads = 0
+        self.builds = 0
+
+    async def get(self, name: str, agent_cls: type[T]) -> T:
+        """
+        按Agent名称获取子Agent实例
+
+        Args:
+            name: Agent名称
+            agent_cls: 子Agent类, 构造参数为Agent配置
+        """
+        now = time.monotonic()
+        entry = self._entries.get(name)
+        if entry and entry[0] > now and isinstance(entry[2], agent_cls):
+            self.hits += 1
+            return entry[2]
+
+        generation = self._generation
+        agent = await Agent.get(name=name)
+        signature = (agent.id, agent.version, agent.update_time)
+        if entry and entry[1] == signature and isinstance(entry[2], agent_cls):
+            self.reloads += 1
+            instance = entry[2]
+        else:
+            self.builds += 1
+            instance = agent_cls(agent)
+            logger.info(f"构建子Agent: {name}, id: {agent.id}, 版本: {agent.version}")
+
+        if generation == self._generation:  # 加载期间配置变更时不写入
+            self._entries[name] = (now + self.ttl, signature, instance)
+        return instance
+
+    def invalidate(self) -> None:
+        self._entries = {}
+        self._generation += 1
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "reloads": self.reloads, "builds": self.builds}
+
+
+agent_registry = AgentRegistry(ttl=APP_SETTINGS.AGENT_REGISTRY_TTL)
+
+
+__all__ = ["AgentRegistry", "agent_registry"]
@@ -42,6 +42,9 @@ class ResultAnalyzerAgent:
         
         # 输出解析器
         self.parser = JsonOutputParser()
+        
+        # LangChain链, 构建一次后复用
+        self.chain = self.prompt | self.llm | self.parser
     
     def _default_prompt(self) -> str:
         """默认提示词模板"""
@@ -71,11 +74,8 @@ class ResultAnalyzerAgent:
         """
         logger.info(f"开始分析诊断结果，预期疾病: {expected_disease}")
         
-        # 构建LangChain链
-        chain = self.prompt | self.llm | self.parser
-        
         try:
-            result = await chain.ainvoke({
+            result = await self.chain.ainvoke({
                 "doctor_response": doctor_response,
                 "expected_disease": expected_disease
             })
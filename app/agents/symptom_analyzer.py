@@ -44,6 +44,9 @@ class SymptomAnalyzerAgent:
         
         # 输出解析器
         self.parser = JsonOutputParser()
+        
+        # LangChain链, 构建一次后复用
+        self.chain = self.prompt | self.llm | self.parser
     
     def _default_prompt(self) -> str:
         """默认提示词模板"""
@@ -81,12 +84,9 @@ class SymptomAnalyzerAgent:
         
         logger.info(f"疾病: {disease.name}, 症状数量: {len(symptoms)}")
         
-        # 构建LangChain链
-        chain = self.prompt | self.llm | self.parser
-        
         # 执行分析
         try:
-            result = await chain.ainvoke({
+            result = await self.chain.ainvoke({
                 "disease_name": disease.name,
                 "symptoms": ", ".join(symptoms)
             })
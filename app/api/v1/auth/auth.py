@@ -1,14 +1,14 @@
 from datetime import datetime, timedelta, timezone, UTC
 
-from fastapi import APIRouter
-from fastapi_cache import JsonCoder
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter, Depends, Request
 
 from app.log import log
 from app.api.v1.utils import insert_log
 from app.controllers.user import user_controller
 from app.core.ctx import CTX_USER_ID
-from app.core.dependency import DependAuth, check_token
+from app.core.dependency import DependAuth, RateLimitControl, check_token
+from app.core.rate_limiter import rate_limiter
+from app.core.route_cache import route_cache
 from app.models.system import LogDetailType, LogType
 from app.models.system import User, Role, Button, StatusType
 from app.schemas.base import Fail, Success
@@ -19,8 +19,9 @@ from app.utils.security import create_access_token
 router = APIRouter()
 
 
-@router.post("/login", summary="登录")
-async def _(credentials: CredentialsSchema):
+@router.post("/login", summary="登录", dependencies=[Depends(RateLimitControl(APP_SETTINGS.RATE_LIMIT_LOGIN_IP))])
+async def _(request: Request, credentials: CredentialsSchema):
+    await rate_limiter.hit(request.scope["route"].path_format, "user_name", credentials.user_name or "", APP_SETTINGS.RATE_LIMIT_LOGIN_USER)
     user_obj: User | None = await user_controller.authenticate(credentials)  # 账号验证, 失败则触发异常返回请求错误
     # user_role_code_list = await user_obj.by_user_roles.values_list("role_code", flat=True)
     # all_login_role_codes = ["R_SUPER", "R_ADMIN", "R_USER"]
@@ -90,9 +91,9 @@ async def _(jwt_token: JWTOut):
     return Success(data=data.model_dump(by_alias=True))
 
 
-@cache(expire=60, coder=JsonCoder)
-@router.get("/user-info", summary="查看用户信息", dependencies=[DependAuth])
-async def _():
+@route_cache.cached("user-info")
+async def _user_info():
+    """用户信息响应, 按用户缓存"""
     user_id = CTX_USER_ID.get()
     user_obj: User = await user_controller.get(id=user_id)
     data = await user_obj.to_dict(exclude_fields=["id", "password", "create_time", "update_time"])
@@ -109,11 +110,18 @@ async def _():
         "roles": user_role_codes,
         "buttons": user_role_button_codes
     })
-    await insert_log(log_type=LogType.UserLog, log_detail_type=LogDetailType.UserLoginGetUserInfo, by_user_id=user_obj.id)
     return Success(data=data)
 
 
-@router.get("/error", summary="自定义后端错误")  # todo 使用限流器, 每秒最多一次
+@router.get("/user-info", summary="查看用户信息", dependencies=[DependAuth])
+async def _():
+    response = await _user_info()
+    # 命中缓存时也记录日志
+    await insert_log(log_type=LogType.UserLog, log_detail_type=LogDetailType.UserLoginGetUserInfo, by_user_id=CTX_USER_ID.get())
+    return response
+
+
+@router.get("/error", summary="自定义后端错误", dependencies=[Depends(RateLimitControl(APP_SETTINGS.RATE_LIMIT_ERROR_IP))])
 async def _(code: str, msg: str):
     if code == "9999":
         return Success(code="4040", msg="accessToken已过期")
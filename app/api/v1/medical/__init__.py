@@ -1,3 +1,10 @@
-from .disease import router
+from fastapi import APIRouter
+
+from .disease import router as router_disease
+from .campaign import router as router_campaign
+
+router = APIRouter()
+router.include_router(router_disease)
+router.include_router(router_campaign)
 
 __all__ = ["router"]
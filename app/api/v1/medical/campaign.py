@@ -0,0 +1,94 @@
+"""
+FileName : campaign.py
+Desc :   批量测试任务API
+"""
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from loguru import logger
+
+from app.core.execution_engine import execution_engine
+from app.models.medical import TestCampaign
+from app.schemas.base import Success
+from app.services import CampaignService
+
+
+router = APIRouter(prefix="/campaigns", tags=["批量测试"])
+
+
+class CreateCampaignRequest(BaseModel):
+    """创建批量测试任务请求, 不指定筛选条件时覆盖全部疾病"""
+    name: str
+    disease_ids: list[int] | None = None
+    department: str | None = None
+    name_contains: str | None = None
+    repeat: int = Field(default=1, ge=1, le=100)
+    max_rounds: int = Field(default=10, ge=1, le=50)
+
+
+@router.post("")
+async def create_campaign(request: CreateCampaignRequest):
+    """
+    创建批量测试任务, 生成的执行由执行引擎并发运行
+    
+    Args:
+        request: 任务参数
+        
+    Returns:
+        任务进度
+    """
+    try:
+        disease_filter = {
+            "diseaseIds": request.disease_ids,
+            "department": request.department,
+            "nameContains": request.name_contains,
+        }
+        campaign = await CampaignService.create_campaign(
+            name=request.name,
+            disease_filter={k: v for k, v in disease_filter.items() if v} or None,
+            repeat=request.repeat,
+            max_rounds=request.max_rounds
+        )
+        if campaign is None:
+            raise HTTPException(status_code=400, detail="没有符合条件的疾病")
+        
+        execution_engine.notify()
+        return Success(data=CampaignService.summary(campaign))
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"创建批量测试任务失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("")
+async def get_campaigns(limit: int = 20):
+    """
+    获取最近的批量测试任务
+    
+    Returns:
+        任务进度列表
+    """
+    campaigns = await TestCampaign.all().order_by("-id").limit(limit)
+    return Success(data=[CampaignService.summary(campaign) for campaign in campaigns])
+
+
+@router.get("/{campaign_id}")
+async def get_campaign(campaign_id: str):
+    """
+    获取批量测试任务进度和汇总指标
+    
+    Args:
+        campaign_id: 任务ID
+        
+    Returns:
+        任务进度
+    """
+    campaign = await TestCampaign.get_or_none(campaign_id=campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return Success(data=CampaignService.summary(campaign))
+
+
+__all__ = ["router"]
@@ -13,6 +13,7 @@ from loguru import logger
 
 from app.models.medical import Disease, TestExecution, ExecutionStep, Conversation
 from app.agents import MasterAgent
+from app.core.execution_engine import execution_engine
 from app.schemas.base import Success
 
 
@@ -52,7 +53,8 @@ class ExecutionDetailResponse(BaseModel):
 @router.post("/start", response_model=TestExecutionResponse)
 async def start_test(request: StartTestRequest):
     """
-    开始测试
+    开始测试, 创建待执行记录后立即返回, 由执行引擎异步运行
+    通过 /execution/{execution_id} 查询进度和结果
     
     Args:
         request: 测试请求参数
@@ -66,18 +68,12 @@ async def start_test(request: StartTestRequest):
         if not disease:
             raise HTTPException(status_code=404, detail="疾病不存在")
         
-        # 初始化主控Agent
-        master = MasterAgent()
-        await master.initialize()
-        
-        # 运行测试
-        execution_id = await master.run_test(
+        # 入队
+        execution = await MasterAgent.create_execution(
             disease_id=request.disease_id,
             max_rounds=request.max_rounds
         )
-        
-        # 获取执行记录
-        execution = await TestExecution.get(execution_id=execution_id)
+        execution_engine.notify()
         
         return TestExecutionResponse(
             execution_id=execution.execution_id,
@@ -85,6 +81,8 @@ async def start_test(request: StartTestRequest):
             status=execution.status.value
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"测试启动失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
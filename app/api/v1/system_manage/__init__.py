@@ -5,6 +5,7 @@ from .agents import router as agent_router
 from .apis import router as api_router
 from .logs import router as log_router
 from .menus import router as menu_router
+from .metrics import router as metrics_router
 from .roles import router as role_router
 from .users import router as user_router
 
@@ -15,3 +16,4 @@ router_system_manage.include_router(menu_router, tags=["菜单管理"], dependen
 router_system_manage.include_router(role_router, tags=["角色管理"], dependencies=[DependPermission])
 router_system_manage.include_router(user_router, tags=["用户管理"], dependencies=[DependPermission])
 router_system_manage.include_router(agent_router, tags=["Agent管理"], dependencies=[DependPermission])
+router_system_manage.include_router(metrics_router, tags=["运行指标"], dependencies=[DependPermission])
@@ -6,9 +6,11 @@ Agent管理API
 from fastapi import APIRouter
 from tortoise.expressions import Q
 
+from app.agents import agent_registry
 from app.api.v1.utils import insert_log
 from app.controllers.agent import agent_controller
-from app.models.system import LogType, LogDetailType
+from app.core.crud import CountStrategy
+from app.models.system import Agent, LogType, LogDetailType
 from app.schemas.base import Success, SuccessExtra, CommonIds
 from app.schemas.agents import AgentCreate, AgentUpdate, AgentSearch
 
@@ -26,14 +28,17 @@ async def _(obj_in: AgentSearch):
     if obj_in.status_type:
         q &= Q(status_type=obj_in.status_type)
 
+    order = ["-id"]
     total, agent_objs = await agent_controller.list(
         page=obj_in.current,
         page_size=obj_in.size,
         search=q,
-        order=["-id"]
+        order=order,
+        cursor=obj_in.cursor,
+        count=CountStrategy.exact,
     )
     
-    records = [await agent_obj.to_dict() for agent_obj in agent_objs]
+    records = await Agent.to_dicts(agent_objs)
     data = {"records": records}
     
     await insert_log(
@@ -41,7 +46,8 @@ async def _(obj_in: AgentSearch):
         log_detail_type=LogDetailType.AgentGetList,
         by_user_id=0
     )
-    return SuccessExtra(data=data, total=total, current=obj_in.current, size=obj_in.size)
+    next_cursor = agent_controller.next_cursor(agent_objs, order, obj_in.size)
+    return SuccessExtra(data=data, total=total, current=obj_in.current, size=obj_in.size, next_cursor=next_cursor)
 
 
 @router.get("/agents/{agent_id}", summary="查看Agent详情")
@@ -83,6 +89,7 @@ async def _(agent_id: int, agent_in: AgentUpdate):
             return Success(code="4090", msg="Agent名称已存在")
     
     await agent_controller.update(id=agent_id, obj_in=agent_in)
+    agent_registry.invalidate()
     await insert_log(
         log_type=LogType.AdminLog,
         log_detail_type=LogDetailType.AgentUpdateOne,
@@ -95,6 +102,7 @@ async def _(agent_id: int, agent_in: AgentUpdate):
 async def _(agent_id: int):
     """删除Agent"""
     await agent_controller.remove(id=agent_id)
+    agent_registry.invalidate()
     await insert_log(
         log_type=LogType.AdminLog,
         log_detail_type=LogDetailType.AgentDeleteOne,
@@ -112,6 +120,7 @@ async def _(obj_in: CommonIds):
         await agent_obj.delete()
         deleted_ids.append(int(agent_id))
     
+    agent_registry.invalidate()
     await insert_log(
         log_type=LogType.AdminLog,
         log_detail_type=LogDetailType.AgentBatchDeleteOne,
@@ -3,10 +3,11 @@ from fastapi.params import Depends
 from tortoise.expressions import Q
 
 from app.api.v1.utils import refresh_api_list, insert_log, generate_tags_recursive_list
-from app.controllers import user_controller
 from app.controllers.api import api_controller
-from app.core.ctx import CTX_USER_ID
-from app.models.system import Api, Role
+from app.core.crud import CountStrategy
+from app.core.ctx import CTX_PRINCIPAL
+from app.core.permission import permission_engine
+from app.models.system import Api
 from app.models.system import LogType, LogDetailType
 from app.schemas.apis import ApiCreate, ApiUpdate, ApiSearch
 from app.schemas.base import Success, SuccessExtra
@@ -27,34 +28,22 @@ async def _(obj_in: ApiSearch):
     if obj_in.status_type:
         q &= Q(status_type=obj_in.status_type)
 
-    user_id = CTX_USER_ID.get()
-    user_obj = await user_controller.get(id=user_id)
-    await user_obj.fetch_related("by_user_roles")
-    user_role_objs: list[Role] = await user_obj.by_user_roles
-    user_role_codes = [role_obj.role_code for role_obj in user_role_objs]
-    if "R_SUPER" in user_role_codes:
-        total, api_objs = await api_controller.list(page=obj_in.current, page_size=obj_in.size, search=q, order=["tags", "id"])
+    principal = CTX_PRINCIPAL.get()
+    if principal.is_super and obj_in.cursor is None:
+        # 页码分页按tags排序; JSON字段不支持键集比较, 不返回nextCursor
+        order = ["tags", "id"]
     else:
-        api_objs: list[Api] = []
-        for role_obj in user_role_objs:
-            await role_obj.fetch_related("by_role_apis")
-            api_objs.extend([api_obj for api_obj in await role_obj.by_role_apis.filter(q)])
-
-        unique_apis = list(set(api_objs))
-        sorted_menus = sorted(unique_apis, key=lambda x: x.id)
-        # 实现分页
-        start = (obj_in.current - 1) * obj_in.size
-        end = start + obj_in.size
-        api_objs = sorted_menus[start:end]
-        total = len(sorted_menus)
-
-    records = []
-    for obj in api_objs:
-        data = await obj.to_dict(exclude_fields=["create_time", "update_time"])
-        records.append(data)
+        # 游标分页(首页传空字符串)按id排序, 首页即返回nextCursor
+        order = ["id"]
+    if not principal.is_super:  # 只返回用户角色被授权的API
+        q &= Q(by_api_roles__id__in=principal.role_ids)
+    total, api_objs = await api_controller.list(page=obj_in.current, page_size=obj_in.size, search=q, order=order, cursor=obj_in.cursor or None, count=CountStrategy.cached)
+    next_cursor = api_controller.next_cursor(api_objs, order, obj_in.size)
+
+    records = await Api.to_dicts(api_objs, exclude_fields=["create_time", "update_time"])
     data = {"records": records}
-    await insert_log(log_type=LogType.UserLog, log_detail_type=LogDetailType.ApiGetList, by_user_id=user_obj.id)
-    return SuccessExtra(data=data, total=total, current=obj_in.current, size=obj_in.size)
+    await insert_log(log_type=LogType.UserLog, log_detail_type=LogDetailType.ApiGetList, by_user_id=principal.user_id)
+    return SuccessExtra(data=data, total=total, current=obj_in.current, size=obj_in.size, next_cursor=next_cursor)
 
 
 @router.get("/apis/{api_id}", summary="查看API")
@@ -101,6 +90,8 @@ async def _(api_in: ApiCreate):
     if isinstance(api_in.tags, str):
         api_in.tags = api_in.tags.split("|")
     new_api = await api_controller.create(obj_in=api_in)
+    permission_engine.invalidate()
+    api_controller.clear_count_cache()
     await insert_log(log_type=LogType.UserLog, log_detail_type=LogDetailType.ApiCreateOne, by_user_id=0)
     return Success(msg="Created Successfully", data={"created_id": new_api.id})
 
@@ -110,6 +101,8 @@ async def _(api_id: int, api_in: ApiUpdate):
     if isinstance(api_in.tags, str):
         api_in.tags = api_in.tags.split("|")
     await api_controller.update(id=api_id, obj_in=api_in)
+    permission_engine.invalidate()
+    api_controller.clear_count_cache()
     await insert_log(log_type=LogType.UserLog, log_detail_type=LogDetailType.ApiUpdateOne, by_user_id=0)
     return Success(msg="Update Successfully", data={"updated_id": api_id})
 
@@ -117,6 +110,8 @@ async def _(api_id: int, api_in: ApiUpdate):
 @router.delete("/apis/{api_id}", summary="删除API")
 async def _(api_id: int):
     await api_controller.remove(id=api_id)
+    permission_engine.invalidate()
+    api_controller.clear_count_cache()
     await insert_log(log_type=LogType.UserLog, log_detail_type=LogDetailType.ApiDeleteOne, by_user_id=0)
     return Success(msg="Deleted Successfully", data={"deleted_id": api_id})
 
@@ -129,6 +124,8 @@ async def _(ids: str = Query(..., description="API ID列表, 用逗号隔开")):
         api_obj = await Api.get(id=int(api_id))
         await api_obj.delete()
         deleted_ids.append(int(api_id))
+    permission_engine.invalidate()
+    api_controller.clear_count_cache()
     await insert_log(log_type=LogType.UserLog, log_detail_type=LogDetailType.ApiBatchDelete, by_user_id=0)
     return Success(msg="Deleted Successfully", data={"deleted_ids": deleted_ids})
 
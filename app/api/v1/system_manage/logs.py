@@ -3,16 +3,44 @@ import json
 from fastapi import APIRouter, Query
 from tortoise.expressions import Q
 
-from app.controllers import user_controller
 from app.controllers.log import log_controller
-from app.core.ctx import CTX_USER_ID
+from app.core.crud import CountStrategy
+from app.core.ctx import CTX_PRINCIPAL
 from app.models.system import LogType
-from app.models.system import User, Role, Log, APILog
+from app.models.system import User, Log, APILog
 from app.schemas.base import Success, SuccessExtra, Fail
 from app.schemas.logs import LogUpdate, LogSearch
+from app.utils.serializer import get_serializer
 
 router = APIRouter()
 
+# 与to_dict(exclude_fields=["by_user_id", "api_log_id"])输出相同的字段, 模型新增字段(如时间戳)时自动投影
+LOG_FIELDS = [field for field in Log._meta.db_fields if field not in ("by_user_id", "api_log_id")]
+API_LOG_FIELDS = list(APILog._meta.db_fields)
+BY_USER_FIELDS = ["id", "nick_name"]
+
+
+def build_log_record(row: dict, log_type: LogType) -> dict:
+    record = get_serializer(Log, include_fields=LOG_FIELDS).serialize_row(row)
+
+    if log_type == LogType.ApiLog:
+        if row["api_log__id"] is not None:
+            # 同名字段(id/createTime/xRequestId等)以关联的API日志为准
+            record.update(get_serializer(APILog).serialize_row(row, prefix="api_log__"))
+            record["requestParams"] = json.dumps(record["requestParams"], ensure_ascii=False)
+            if "responseData" in record:
+                record["responseData"] = json.dumps(record["responseData"], ensure_ascii=False)
+        return {"logUser": "Request", **record}
+
+    if log_type == LogType.SystemLog:
+        record["logUser"] = "System"
+    elif row["by_user__id"] is not None:
+        record["byUser"] = str(row["by_user__id"])
+        record["byUserInfo"] = get_serializer(User, include_fields=BY_USER_FIELDS).serialize_row(row, prefix="by_user__")
+    else:
+        record["byUser"] = None
+    return record
+
 
 @router.post("/logs/all/", summary="查看日志列表")
 async def _(log_in: LogSearch):
@@ -37,51 +65,48 @@ async def _(log_in: LogSearch):
         q &= Q(log_detail_type=log_in.log_detail_type)
     if log_in.request_path:
         q &= Q(api_log__request_path__contains=log_in.request_path)
+    if log_in.route_template:
+        q &= Q(api_log__route_template=log_in.route_template)
     if log_in.response_code:
         q &= Q(api_log__response_code=log_in.response_code)
     if log_in.time_range:
         if len(log_in.time_range) != 2:
             return Success(msg="时间范围只能为两个值", code=2000)
         q &= Q(create_time__gt=log_in.time_range[0], create_time__lt=log_in.time_range[1])
+        if log_in.log_type == LogType.ApiLog:  # 关联的API日志与日志同时写入, 附加相同时间范围以便分区裁剪
+            q &= Q(api_log__create_time__gt=log_in.time_range[0], api_log__create_time__lt=log_in.time_range[1])
 
     if log_in.x_request_id:
         q &= Q(x_request_id=log_in.x_request_id)
 
-    user_id = CTX_USER_ID.get()
-    user_obj = await user_controller.get(id=user_id)
-    user_role_objs: list[Role] = await user_obj.by_user_roles
-    user_role_codes = [role_obj.role_code for role_obj in user_role_objs]
+    user_role_codes = CTX_PRINCIPAL.get().role_codes
 
     if "R_ADMIN" in user_role_codes and log_in.log_type not in [LogType.ApiLog, LogType.UserLog]:  # 管理员只能查看API日志和用户日志
         return Fail(msg="Permission Denied")
     elif "R_SUPER" not in user_role_codes and "R_ADMIN" not in user_role_codes and log_in.log_type != LogType.ApiLog:  # 非超级管理员和管理员只能查看API日志
         return Fail(msg="Permission Denied")
 
-    total, log_objs = await log_controller.list(page=log_in.current, page_size=log_in.size, search=q, order=["-id"])
-    records = []
-    for obj in log_objs:
-        await obj.fetch_related("api_log", "by_user")
-        api_log: APILog = obj.api_log
-        by_user: User = obj.by_user
-        record = await obj.to_dict(exclude_fields=["by_user_id", "api_log_id"])
-        if log_in.log_type == LogType.ApiLog:
-            api_log_dict = await api_log.to_dict(exclude_fields=[])
-            api_log_dict["requestParams"] = json.dumps(api_log_dict["requestParams"], ensure_ascii=False)
-            api_log_dict["responseData"] = json.dumps(api_log_dict["responseData"], ensure_ascii=False)
-            record.update(api_log_dict)
-            record = {"logUser": "Request", **record}
-        elif log_in.log_type == LogType.SystemLog:
-            record["logUser"] = "System"
-        else:
-            if by_user:
-                record["byUser"] = str(by_user.id)
-                record["byUserInfo"] = await by_user.to_dict(include_fields=["id", "nick_name"])
-            else:
-                record["byUser"] = None
-
-        records.append(record)
+    order = ["-id"]
+    values = [*LOG_FIELDS, *(f"by_user__{field}" for field in BY_USER_FIELDS)]
+    if log_in.log_type == LogType.ApiLog:
+        api_log_fields = [field for field in API_LOG_FIELDS if log_in.with_response_data or field != "response_data"]
+        values = [*LOG_FIELDS, *(f"api_log__{field}" for field in api_log_fields)]
+
+    # 只有多对一/一对一关联, 一次联表投影取出整页, 查询次数与每页条数无关
+    total, rows = await log_controller.list(
+        page=log_in.current,
+        page_size=log_in.size,
+        search=q,
+        order=order,
+        cursor=log_in.cursor,
+        count=CountStrategy.estimated,
+        values=values,
+        distinct=False,
+    )
+    records = [build_log_record(row, log_in.log_type) for row in rows]
     data = {"records": records}
-    return SuccessExtra(data=data, total=total, current=log_in.current, size=log_in.size)
+    next_cursor = log_controller.next_cursor(rows, order, log_in.size)
+    return SuccessExtra(data=data, total=total, current=log_in.current, size=log_in.size, next_cursor=next_cursor)
 
 
 @router.get("/logs/{log_id}", summary="查看日志")
@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+
+from app.agents import agent_registry
+from app.core.execution_engine import execution_engine
+from app.core.http_client import doctor_http_client
+from app.core.log_sampler import log_sampler
+from app.core.log_writer import log_writer
+from app.core.menu_ancestry import menu_ancestry
+from app.core.permission import permission_engine
+from app.core.principal import principal_cache
+from app.core.rate_limiter import rate_limiter
+from app.core.route_cache import route_cache
+from app.core.token_cache import token_cache
+from app.schemas.base import Success
+from app.services import doctor_token_provider
+from app.utils.security import password_hasher
+
+router = APIRouter()
+
+
+@router.get("/metrics", summary="查看运行指标")
+async def _():
+    data = {
+        "executionEngine": execution_engine.stats(),
+        "agentRegistry": agent_registry.stats(),
+        "doctorHttpClient": doctor_http_client.stats(),
+        "doctorToken": doctor_token_provider.stats(),
+        "logWriter": log_writer.stats(),
+        "logSampler": log_sampler.stats(),
+        "permission": permission_engine.stats(),
+        "menuAncestry": menu_ancestry.stats(),
+        "principal": principal_cache.stats(),
+        "tokenCache": token_cache.stats(),
+        "passwordHasher": password_hasher.stats(),
+        "rateLimiter": rate_limiter.stats(),
+        "routeCache": route_cache.stats(),
+    }
+    return Success(data=data)
@@ -3,7 +3,13 @@ from tortoise.expressions import Q
 
 from app.api.v1.utils import insert_log
 from app.controllers import role_controller
+from app.controllers.api import api_controller
 from app.controllers.menu import menu_controller
+from app.core.crud import CountStrategy, sync_m2m
+from app.core.menu_ancestry import menu_ancestry
+from app.core.permission import permission_engine
+from app.core.principal import principal_cache
+from app.core.route_cache import route_cache
 from app.models.system import Api, Button, Role
 from app.models.system import LogType, LogDetailType
 from app.schemas.base import Success, SuccessExtra
@@ -18,7 +24,8 @@ async def _(
         size: int = Query(10, description="每页数量"),
         roleName: str = Query(None, description="角色名称"),
         roleCode: str = Query(None, description="角色编码"),
-        status: str = Query(None, description="用户状态")
+        status: str = Query(None, description="用户状态"),
+        cursor: str = Query(None, description="游标, 传入上一页返回的nextCursor后按游标分页")
 ):
     q = Q()
     if roleName:
@@ -28,11 +35,13 @@ async def _(
     if status:
         q &= Q(status__contains=status)
 
-    total, role_objs = await role_controller.list(page=current, page_size=size, search=q, order=["id"])
-    records = [await role_obj.to_dict() for role_obj in role_objs]  # exclude_fields=["role_desc"]
+    order = ["id"]
+    total, role_objs = await role_controller.list(page=current, page_size=size, search=q, order=order, cursor=cursor, count=CountStrategy.exact)
+    records = await Role.to_dicts(role_objs)  # exclude_fields=["role_desc"]
     data = {"records": records}
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.RoleGetList, by_user_id=0)
-    return SuccessExtra(data=data, total=total, current=current, size=size)
+    next_cursor = role_controller.next_cursor(role_objs, order, size)
+    return SuccessExtra(data=data, total=total, current=current, size=size, next_cursor=next_cursor)
 
 
 @router.get("/roles/{role_id}", summary="查看角色")
@@ -57,6 +66,8 @@ async def _(role_in: RoleCreate):
 @router.patch("/roles/{role_id}", summary="更新角色")
 async def _(role_id: int, role_in: RoleUpdate):
     await role_controller.update(id=role_id, obj_in=role_in)
+    principal_cache.invalidate()
+    await route_cache.invalidate()
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.RoleUpdateOne, by_user_id=0)
     return Success(msg="Updated Successfully", data={"updated_id": role_id})
 
@@ -64,6 +75,10 @@ async def _(role_id: int, role_in: RoleUpdate):
 @router.delete("/roles/{role_id}", summary="删除角色")
 async def _(role_id: int):
     await role_controller.remove(id=role_id)
+    permission_engine.invalidate()
+    api_controller.clear_count_cache()  # API列表按角色过滤的计数缓存
+    principal_cache.invalidate()
+    await route_cache.invalidate()
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.RoleDeleteOne, by_user_id=0)
     return Success(msg="Deleted Successfully", data={"deleted_id": role_id})
 
@@ -76,6 +91,10 @@ async def _(ids: str = Query(..., description="角色ID列表, 用逗号隔开")
         role_obj = await role_controller.get(id=int(role_id))
         await role_obj.delete()
         deleted_ids.append(int(role_id))
+    permission_engine.invalidate()
+    api_controller.clear_count_cache()  # API列表按角色过滤的计数缓存
+    principal_cache.invalidate()
+    await route_cache.invalidate()
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.RoleBatchDeleteOne, by_user_id=0)
     return Success(msg="Deleted Successfully", data={"deleted_ids": deleted_ids})
 
@@ -97,19 +116,16 @@ async def _(role_id: int, role_in: RoleUpdateAuthrization):
     if role_in.by_role_home_id:
         role_obj = await role_controller.update(id=role_id, obj_in=dict(by_role_home_id=role_in.by_role_home_id))
         if role_in.by_role_menu_ids:
-            menu_objs = await menu_controller.get_by_id_list(id_list=role_in.by_role_menu_ids)
+            menu_ids = await menu_ancestry.with_ancestors(role_in.by_role_menu_ids)  # 同时授权所有上级菜单
+            menu_objs = await menu_controller.get_by_id_list(id_list=list(menu_ids))
             if not menu_objs:
                 return Success(msg="获取角色菜单对象失败", code=2000)
 
-            await role_obj.by_role_menus.clear()
-            while len(menu_objs) > 0:  # 递归添加子父菜单
-                menu_obj = menu_objs.pop()
-                await role_obj.by_role_menus.add(menu_obj)
-                if menu_obj.parent_id != 0:  # 是否为子菜单
-                    menu_objs.append(await menu_controller.get(id=menu_obj.parent_id))  # 添加子菜单的父菜单
+            await sync_m2m(role_obj, "by_role_menus", menu_objs)
         else:
             await role_obj.by_role_menus.clear()  # 去除所有角色菜单
 
+    await route_cache.invalidate()
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.RoleUpdateMenus, by_user_id=0)
     return Success(msg="Updated Successfully", data={"by_role_menu_ids": role_in.by_role_menu_ids, "by_role_home_id": role_in.by_role_home_id})
 
@@ -131,11 +147,9 @@ async def _(role_id: int):
 async def _(role_id: int, role_in: RoleUpdateAuthrization):
     role_obj = await role_controller.get(id=role_id)
     if role_in.by_role_button_ids is not None:
-        await role_obj.by_role_buttons.clear()
-        for button_id in role_in.by_role_button_ids:
-            button_obj = await Button.get(id=button_id)
-            await role_obj.by_role_buttons.add(button_obj)
+        await sync_m2m(role_obj, "by_role_buttons", await Button.filter(id__in=role_in.by_role_button_ids))
 
+    await route_cache.invalidate()
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.RoleUpdateButtons, by_user_id=0)
     return Success(msg="Updated Successfully", data={"by_role_button_ids": role_in.by_role_button_ids})
 
@@ -157,10 +171,9 @@ async def _(role_id: int):
 async def _(role_id: int, role_in: RoleUpdateAuthrization):
     role_obj = await role_controller.get(id=role_id)
     if role_in.by_role_api_ids is not None:
-        await role_obj.by_role_apis.clear()
-        for api_id in role_in.by_role_api_ids:
-            api_obj = await Api.get(id=api_id)
-            await role_obj.by_role_apis.add(api_obj)
+        await sync_m2m(role_obj, "by_role_apis", await Api.filter(id__in=role_in.by_role_api_ids))
+        permission_engine.invalidate()
+        api_controller.clear_count_cache()  # API列表按角色过滤的计数缓存
 
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.RoleUpdateApis, by_user_id=0)
     return Success(msg="Updated Successfully", data={"by_role_api_ids": role_in.by_role_api_ids})
@@ -3,7 +3,8 @@ from tortoise.expressions import Q
 
 from app.api.v1.utils import insert_log
 from app.controllers.user import user_controller
-from app.models.system import LogType, LogDetailType
+from app.core.crud import CountStrategy
+from app.models.system import User, LogType, LogDetailType
 from app.schemas.base import Success, SuccessExtra, CommonIds
 from app.schemas.users import UserCreate, UserUpdate, UserSearch
 
@@ -28,17 +29,17 @@ async def _(obj_in: UserSearch):
     if obj_in.by_user_role_code_list:
         q &= Q(by_user_roles__role_code__in=obj_in.by_user_role_code_list)
 
-    total, user_objs = await user_controller.list(page=obj_in.current, page_size=obj_in.size, search=q, order=["id"])
-    records = []
-    for user_obj in user_objs:
-        record = await user_obj.to_dict(exclude_fields=["password"])
-        await user_obj.fetch_related("by_user_roles")
+    order = ["id"]
+    total, user_objs = await user_controller.list(page=obj_in.current, page_size=obj_in.size, search=q, order=order, cursor=obj_in.cursor, count=CountStrategy.exact)
+    records = await User.to_dicts(user_objs, exclude_fields=["password"])
+    await User.fetch_for_list(user_objs, "by_user_roles")
+    for user_obj, record in zip(user_objs, records):
         user_role_code_list = [by_user_role.role_code for by_user_role in user_obj.by_user_roles]
         record.update({"byUserRoleCodeList": user_role_code_list})
-        records.append(record)
     data = {"records": records}
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.UserGetList, by_user_id=0)
-    return SuccessExtra(data=data, total=total, current=obj_in.current, size=obj_in.size)
+    next_cursor = user_controller.next_cursor(user_objs, order, obj_in.size)
+    return SuccessExtra(data=data, total=total, current=obj_in.current, size=obj_in.size, next_cursor=next_cursor)
 
 
 @router.get("/users/{user_id}", summary="查看用户")
@@ -88,8 +89,7 @@ async def _(user_id: int):
 async def _(obj_in: CommonIds):
     deleted_ids = []
     for user_id in obj_in.ids:
-        user_obj = await user_controller.get(id=int(user_id))
-        await user_obj.delete()
+        await user_controller.remove(id=int(user_id))
         deleted_ids.append(int(user_id))
 
     await insert_log(log_type=LogType.AdminLog, log_detail_type=LogDetailType.UserBatchDeleteOne, by_user_id=0)
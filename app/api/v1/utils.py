@@ -1,8 +1,11 @@
 from fastapi.routing import APIRoute
 from loguru import logger
 
+from app.controllers.api import api_controller
 from app.core.ctx import CTX_USER_ID, CTX_X_REQUEST_ID
-from app.models.system import Api, Log
+from app.core.log_writer import log_writer
+from app.core.permission import permission_engine
+from app.models.system import Api
 from app.models.system import LogType, LogDetailType
 
 
@@ -25,6 +28,9 @@ async def refresh_api_list():
         tags = list(route.tags)
         await Api.update_or_create(api_path=api_path, api_method=api_method, defaults=dict(summary=summary, tags=tags))
 
+    permission_engine.invalidate()
+    api_controller.clear_count_cache()
+
 
 async def generate_tags_recursive_list():
     from app import app
@@ -54,7 +60,7 @@ async def generate_tags_recursive_list():
 
 async def insert_log(log_type: LogType, log_detail_type: LogDetailType, by_user_id: int | None = None):
     """
-    插入日志
+    插入日志, 入队后由后台任务批量写入
     :param log_type:
     :param log_detail_type:
     :param by_user_id: 0为从上下文获取当前用户id, 需要请求携带token
@@ -63,4 +69,4 @@ async def insert_log(log_type: LogType, log_detail_type: LogDetailType, by_user_
     if by_user_id == 0 and (by_user_id := CTX_USER_ID.get()) == 0:
         by_user_id = None
 
-    await Log.create(log_type=log_type, log_detail_type=log_detail_type, by_user_id=by_user_id, x_request_id=CTX_X_REQUEST_ID.get())
+    log_writer.put_log(log_type=log_type, log_detail_type=log_detail_type, by_user_id=by_user_id, x_request_id=CTX_X_REQUEST_ID.get())
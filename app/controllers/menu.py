@@ -1,6 +1,6 @@
 from loguru import logger
 
-from app.core.crud import CRUDBase
+from app.core.crud import CRUDBase, sync_m2m
 from app.models.system import Button, Menu
 from app.schemas.menus import ButtonBase, MenuCreate, MenuUpdate
 
@@ -29,15 +29,20 @@ class MenuController(CRUDBase[Menu, MenuCreate, MenuUpdate]):
 
         menu_buttons = [button.button_code for button in buttons]
 
-        for button_code in set(existing_buttons) - set(menu_buttons):
-            logger.error(f"Button Deleted {button_code}")
-            await Button.filter(button_code=button_code).delete()
+        if deleted_codes := set(existing_buttons) - set(menu_buttons):
+            logger.error(f"Button Deleted {', '.join(sorted(deleted_codes))}")
+            await Button.filter(button_code__in=deleted_codes).delete()
 
-        await menu.by_menu_buttons.clear()
+        button_objs = {button_obj.button_code: button_obj for button_obj in await Button.filter(button_code__in=menu_buttons)}
         for button in buttons:
-            button_obj, _ = await Button.update_or_create(button_code=button.button_code, defaults=dict(button_desc=button.button_desc))
-            await menu.by_menu_buttons.add(button_obj)
-
+            button_obj = button_objs.get(button.button_code)
+            if button_obj is None:
+                button_objs[button.button_code] = await Button.create(button_code=button.button_code, button_desc=button.button_desc)
+            elif button_obj.button_desc != button.button_desc:
+                button_obj.button_desc = button.button_desc
+                await button_obj.save(update_fields=["button_desc"])
+
+        await sync_m2m(menu, "by_menu_buttons", list(button_objs.values()))
         return True
 
 
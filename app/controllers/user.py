@@ -1,12 +1,15 @@
 from datetime import datetime
 
-from app.core.crud import CRUDBase
+from app.core.crud import CRUDBase, sync_m2m
 from app.core.exceptions import HTTPException
+from app.core.log_writer import log_writer
+from app.core.principal import principal_cache
+from app.core.route_cache import route_cache
 from app.models.system import LogType, LogDetailType
-from app.models.system import Role, User, Log, StatusType
+from app.models.system import Role, User, StatusType
 from app.schemas.login import CredentialsSchema
 from app.schemas.users import UserCreate, UserUpdate
-from app.utils.security import get_password_hash, verify_password
+from app.utils.security import password_hasher
 
 
 class UserController(CRUDBase[User, UserCreate, UserUpdate]):
@@ -20,7 +23,7 @@ class UserController(CRUDBase[User, UserCreate, UserUpdate]):
         return await self.model.filter(user_name=user_name).first()
 
     async def create(self, obj_in: UserCreate) -> User:  # type: ignore
-        obj_in.password = get_password_hash(password=obj_in.password)
+        obj_in.password = await password_hasher.hash(obj_in.password)
 
         if not obj_in.nick_name:
             obj_in.nick_name = obj_in.user_name
@@ -30,32 +33,45 @@ class UserController(CRUDBase[User, UserCreate, UserUpdate]):
 
     async def update(self, user_id: int, obj_in: UserUpdate) -> User:  # type: ignore
         if obj_in.password:
-            obj_in.password = get_password_hash(password=obj_in.password)
+            obj_in.password = await password_hasher.hash(obj_in.password)
         else:
             obj_in.password = None
 
-        return await super().update(id=user_id, obj_in=obj_in, exclude={"byUserRoles"})
+        user = await super().update(id=user_id, obj_in=obj_in, exclude={"byUserRoles"})
+        principal_cache.invalidate(user_id)
+        await route_cache.invalidate(user_id)
+        return user
+
+    async def remove(self, id: int) -> None:
+        await super().remove(id=id)
+        principal_cache.invalidate(id)
+        await route_cache.invalidate(id)
 
     async def update_last_login(self, user_id: int) -> None:
         user = await self.model.get(id=user_id)
         user.last_login = datetime.now()
         await user.save()
+        await route_cache.invalidate(user_id)  # user-info缓存中包含lastLogin
 
     async def authenticate(self, credentials: CredentialsSchema) -> User:
         user = await self.model.filter(user_name=credentials.user_name).first()
 
         if not user:
-            await Log.create(log_type=LogType.UserLog, by_user=None, log_detail_type=LogDetailType.UserLoginUserNameVaild)
+            log_writer.put_log(log_type=LogType.UserLog, by_user_id=None, log_detail_type=LogDetailType.UserLoginUserNameVaild)
             raise HTTPException(code="4040", msg="Incorrect username or password!")
 
-        verified = verify_password(credentials.password, user.password)
+        verified, new_hash = await password_hasher.verify_and_update(credentials.password, user.password)
 
         if not verified:
-            await Log.create(log_type=LogType.UserLog, by_user=user, log_detail_type=LogDetailType.UserLoginErrorPassword)
+            log_writer.put_log(log_type=LogType.UserLog, by_user_id=user.id, log_detail_type=LogDetailType.UserLoginErrorPassword)
             raise HTTPException(code="4040", msg="Incorrect username or password!")
 
+        if new_hash is not None:  # argon2参数已变更, 按新参数重新哈希
+            user.password = new_hash
+            await user.save(update_fields=["password"])
+
         if user.status_type == StatusType.disable:
-            await Log.create(log_type=LogType.UserLog, by_user=user, log_detail_type=LogDetailType.UserLoginForbid)
+            log_writer.put_log(log_type=LogType.UserLog, by_user_id=user.id, log_detail_type=LogDetailType.UserLoginForbid)
             raise HTTPException(code="4040", msg="This user has been disabled.")
 
         return user
@@ -68,11 +84,9 @@ class UserController(CRUDBase[User, UserCreate, UserUpdate]):
         if isinstance(role_id_list, str):
             role_id_list = role_id_list.split("|")
 
-        await user.by_user_roles.clear()
-        user_role_objs = await Role.filter(id__in=role_id_list)
-
-        for user_role_obj in user_role_objs:
-            await user.by_user_roles.add(user_role_obj)
+        await sync_m2m(user, "by_user_roles", await Role.filter(id__in=role_id_list))
+        principal_cache.invalidate(user.id)
+        await route_cache.invalidate(user.id)
 
         return True
 
@@ -84,11 +98,9 @@ class UserController(CRUDBase[User, UserCreate, UserUpdate]):
         if isinstance(roles_code_list, str):
             roles_code_list = roles_code_list.split("|")
 
-        user_role_objs = await Role.filter(role_code__in=roles_code_list)
-        print("user_role_objs", user_role_objs)
-        await user.by_user_roles.clear()
-        for user_role_obj in user_role_objs:
-            await user.by_user_roles.add(user_role_obj)
+        await sync_m2m(user, "by_user_roles", await Role.filter(role_code__in=roles_code_list))
+        principal_cache.invalidate(user.id)
+        await route_cache.invalidate(user.id)
 
         return True
 
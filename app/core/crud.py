@@ -1,8 +1,18 @@
+import base64
+import hashlib
+import time
+from enum import Enum
 from typing import Generic, NewType, TypeVar, Any
 
+import orjson
 from pydantic import BaseModel
 from tortoise.expressions import Q
+from tortoise.fields import JSONField, ManyToManyRelation
 from tortoise.models import Model
+from tortoise.transactions import in_transaction
+
+from app.core.exceptions import HTTPException
+from app.settings import APP_SETTINGS
 
 Total = NewType("Total", int)
 ModelType = TypeVar("ModelType", bound=Model)
@@ -10,13 +20,170 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+class CountStrategy(str, Enum):
+    exact = "exact"  # COUNT(DISTINCT 主键)
+    estimated = "estimated"  # PostgreSQL规划器估算(无过滤条件取pg_class.reltuples, 否则取EXPLAIN的行数)
+    cached = "cached"  # 精确计数, 按过滤条件缓存一段时间
+    has_more = "has_more"  # 不计数, 只多取一条判断是否有下一页, total为已翻过的条数加本页条数
+
+
+async def sync_m2m(instance: Model, field: str, targets: list[Model]) -> tuple[list[Model], list[Model]]:
+    """
+    多对多关联按差异同步为targets, 只插入新增的关联、只删除移除的关联, 在一个事务中完成
+    查询次数与关联数量无关, 替代 clear() + 逐个add() 的写法
+    :return: (新增的对象, 移除的对象)
+    """
+    relation: ManyToManyRelation = getattr(instance, field)
+    target_pks = {obj.pk for obj in targets}
+    async with in_transaction(instance._meta.default_connection) as conn:
+        current = await relation.all().using_db(conn)
+        current_pks = {obj.pk for obj in current}
+        added = list({obj.pk: obj for obj in targets if obj.pk not in current_pks}.values())
+        removed = [obj for obj in current if obj.pk not in target_pks]
+        if added:
+            await relation.add(*added, using_db=conn)
+        if removed:
+            await relation.remove(*removed, using_db=conn)
+    return added, removed
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: type[ModelType]):
         self.model = model
+        self._count_cache: dict[str, tuple[float, int]] = {}
 
     async def get(self, *args: Q, **kwargs) -> ModelType:
         return await self.model.get(*args, **kwargs)
 
+    def keyset_order(self, order: list[str]) -> list[str]:
+        """排序末尾补充主键, 保证排序唯一, 键集分页结果稳定"""
+        pk_attr = self.model._meta.pk_attr
+        if any(item.lstrip("-") in (pk_attr, "pk") for item in order):
+            return order
+        return [*order, pk_attr]
+
+    def next_cursor(self, objs: list[ModelType] | list[dict[str, Any]], order: list[str] | None, page_size: int | None) -> str | None:
+        """
+        根据当前页最后一条记录生成下一页游标, 不是满页或排序字段不支持比较时返回None
+        """
+        order = self.keyset_order(order or [])
+        if not objs or len(objs) < (page_size or 10):
+            return None
+        if any(isinstance(self.model._meta.fields_map.get(item.lstrip("-")), JSONField) for item in order):
+            return None
+
+        last = objs[-1]
+        if isinstance(last, dict):  # values投影的结果
+            values = [last[item.lstrip("-")] for item in order]
+        else:
+            values = [getattr(last, item.lstrip("-")) for item in order]
+        raw = orjson.dumps({"order": order, "values": values}, default=str)
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def cursor_values(cursor: str, order: list[str]) -> list[Any]:
+        """取出游标中记录的排序字段值"""
+        try:
+            data = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            values = data["values"]
+            if data["order"] != order or len(values) != len(order):
+                raise ValueError("order mismatch")
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(code="4000", msg="Invalid cursor")
+        return values
+
+    def decode_cursor(self, cursor: str, order: list[str]) -> Q:
+        """
+        游标解码为键集条件, 例如 order=["name", "-id"] 时生成 name > v1 OR (name = v1 AND id < v2)
+        空值按数据库默认规则处理: PostgreSQL升序排在最后, SQLite/MySQL升序排在最前
+        """
+        values = self.cursor_values(cursor, order)
+        fields_map = self.model._meta.fields_map
+        nulls_last_asc = self.model._meta.db.capabilities.dialect == "postgres"
+        condition: Q | None = None
+        for item, value in reversed(list(zip(order, values))):
+            name, desc = item.lstrip("-"), item.startswith("-")
+            field = fields_map.get(name)
+            if field is None or isinstance(field, JSONField):
+                raise HTTPException(code="4000", msg=f"Cursor pagination does not support ordering by {name}")
+
+            nulls_first = desc if nulls_last_asc else not desc
+            parts: list[Q] = []
+            if value is None:
+                equal = Q(**{f"{name}__isnull": True})
+                if nulls_first:
+                    parts.append(Q(**{f"{name}__isnull": False}))
+            else:
+                value = field.to_python_value(value)
+                equal = Q(**{name: value})
+                parts.append(Q(**{f"{name}__lt" if desc else f"{name}__gt": value}))
+                if field.null and not nulls_first:
+                    parts.append(Q(**{f"{name}__isnull": True}))
+
+            if condition is not None:
+                parts.append(Q(equal, condition))
+            condition = Q(*parts, join_type="OR") if parts else Q(**{f"{name}__isnull": True}) & Q(**{f"{name}__isnull": False})
+
+        return condition or Q()
+
+    @staticmethod
+    def _parameterized_sql(query) -> tuple[str, list[Any]]:
+        query._choose_db_if_not_chosen()
+        query._make_query()
+        return query.query.get_parameterized_sql()
+
+    async def count_exact(self, query) -> int:
+        """对去重后的主键计数, 关联过滤产生的重复行不计入"""
+        sql, params = self._parameterized_sql(query.values_list(self.model._meta.pk_attr, flat=True))
+        _, rows = await self.model._meta.db.execute_query(f"SELECT COUNT(*) AS total FROM ({sql}) AS t", params)
+        return rows[0]["total"] if rows else 0
+
+    async def count_estimated(self, query, filtered: bool) -> int:
+        """
+        PostgreSQL规划器估算的行数, 估算值低于LIST_COUNT_ESTIMATE_MIN或非PostgreSQL时改为精确计数
+        """
+        db = self.model._meta.db
+        if db.capabilities.dialect != "postgres":
+            return await self.count_exact(query)
+
+        if filtered:
+            sql, params = self._parameterized_sql(query.values_list(self.model._meta.pk_attr, flat=True))
+            _, rows = await db.execute_query(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = rows[0]["QUERY PLAN"] if rows else None
+            if isinstance(plan, str):
+                plan = orjson.loads(plan)
+            estimate = int(plan[0]["Plan"]["Plan Rows"]) if plan else 0
+        else:
+            # 分区表的父表没有统计信息, 累加各分区
+            _, rows = await db.execute_query(
+                "SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint AS estimate FROM pg_class c "
+                "WHERE c.oid = to_regclass($1) OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass($1))",
+                [self.model._meta.db_table],
+            )
+            estimate = rows[0]["estimate"] if rows else 0
+
+        if estimate < APP_SETTINGS.LIST_COUNT_ESTIMATE_MIN:
+            return await self.count_exact(query)
+        return estimate
+
+    async def count_cached(self, query) -> int:
+        """精确计数按SQL及参数指纹缓存LIST_COUNT_CACHE_TTL秒"""
+        sql, params = self._parameterized_sql(query.values_list(self.model._meta.pk_attr, flat=True))
+        key = hashlib.sha1(orjson.dumps([sql, params], default=str)).hexdigest()
+        now = time.monotonic()
+        if (cached := self._count_cache.get(key)) and cached[0] > now:
+            return cached[1]
+
+        total = await self.count_exact(query)
+        if len(self._count_cache) >= 1024:
+            self._count_cache = {k: v for k, v in self._count_cache.items() if v[0] > now}
+        self._count_cache[key] = (now + APP_SETTINGS.LIST_COUNT_CACHE_TTL, total)
+        return total
+
+    def clear_count_cache(self) -> None:
+        """表数据增删后调用, 避免cached计数在LIST_COUNT_CACHE_TTL内返回旧值"""
+        self._count_cache.clear()
+
     async def list(
             self,
             page: int | None,
@@ -25,29 +192,55 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             order: list[str] | None = None,
             fields: list[str] | None = None,
             last_id: int | None = None,
-            count_by_pk_field: bool = False
-    ) -> tuple[Total, list[ModelType]]:
-        order = order or []
+            cursor: str | None = None,
+            count: CountStrategy = CountStrategy.exact,
+            values: list[str] | None = None,
+            distinct: bool = True,
+    ) -> tuple[Total, list[ModelType] | list[dict[str, Any]]]:
+        """
+        :param cursor: 上一页返回的游标(next_cursor), 传入后按order做键集分页, 忽略page
+        :param count: total的计数方式, 大表使用estimated/cached/has_more避免每次全量计数
+        :param values: 按字段投影返回字典, 支持"关联字段__字段"跨表取值, 需包含order中的字段
+        :param distinct: 只有一对一/多对一关联时无需去重, 关闭后避免对整行做DISTINCT
+        """
+        order = self.keyset_order(order or [])
         page = page or 1
         page_size = page_size or 10
 
-        query = self.model.filter(search).distinct()
+        query = self.model.filter(search)
+        if distinct:
+            query = query.distinct()
         if last_id:
             query = query.filter(id__gt=last_id)
 
+        count_query = query
         if fields:
             query = query.only(*fields)
 
-        if count_by_pk_field:
-            total = await query.values_list(self.model._meta.pk_attr, flat=True)
-            total = len(set(total))
+        offset = 0 if cursor or last_id else (page - 1) * page_size
+        if count == CountStrategy.exact:
+            total = await self.count_exact(count_query)
+        elif count == CountStrategy.estimated:
+            total = await self.count_estimated(count_query, filtered=bool(search.children or search.filters) or bool(last_id))
+        elif count == CountStrategy.cached:
+            total = await self.count_cached(count_query)
         else:
-            total = await query.count()
+            total = None
 
-        if last_id:
-            result = await query.order_by(*order).limit(page_size)
+        limit = page_size + 1 if total is None else page_size
+        if cursor:
+            query = query.filter(self.decode_cursor(cursor, order)).order_by(*order).limit(limit)
+        elif last_id:
+            query = query.order_by(*order).limit(limit)
         else:
-            result = await query.offset((page - 1) * page_size).limit(page_size).order_by(*order)
+            query = query.offset(offset).limit(limit).order_by(*order)
+        result = await (query.values(*values) if values else query)
+
+        if total is None:
+            total = offset + len(result)
+            result = result[:page_size]
+        elif result:
+            total = max(total, offset + len(result))  # 估算或缓存的值不小于已翻过的条数
 
         return Total(total), result
 
@@ -1,7 +1,12 @@
 import contextvars
+from typing import TYPE_CHECKING
 
 from starlette.background import BackgroundTasks
 
+if TYPE_CHECKING:
+    from app.core.principal import Principal
+
 CTX_USER_ID: contextvars.ContextVar[int] = contextvars.ContextVar("user_id", default=0)
 CTX_X_REQUEST_ID: contextvars.ContextVar[str] = contextvars.ContextVar("x_request_id", default="")
+CTX_PRINCIPAL: contextvars.ContextVar["Principal | None"] = contextvars.ContextVar("principal", default=None)
 CTX_BG_TASKS: contextvars.ContextVar[BackgroundTasks | None] = contextvars.ContextVar("bg_task", default=None)
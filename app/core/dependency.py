@@ -4,19 +4,23 @@ import jwt
 from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 
-from app.core.ctx import CTX_USER_ID, CTX_X_REQUEST_ID
+from app.core.ctx import CTX_PRINCIPAL, CTX_USER_ID, CTX_X_REQUEST_ID
 from app.core.exceptions import (
     HTTPException,
 )
+from app.core.permission import permission_engine
+from app.core.principal import Principal, principal_cache
+from app.core.rate_limiter import rate_limiter
+from app.core.token_cache import token_cache
 from app.log import log
-from app.models.system import User, StatusType
+from app.models.system import StatusType
 from app.settings import APP_SETTINGS
-from app.utils.tools import check_url
+from app.utils.route_matcher import route_matcher
 
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 
 
-def check_token(token: str) -> tuple[bool, int, Any]:
+def _decode_token(token: str) -> tuple[bool, int, Any]:
     try:
         options = {"verify_signature": True, "verify_aud": False, "exp": True}
         decode_data = jwt.decode(token, APP_SETTINGS.SECRET_KEY, algorithms=[APP_SETTINGS.JWT_ALGORITHM], options=options)
@@ -29,13 +33,26 @@ def check_token(token: str) -> tuple[bool, int, Any]:
         return False, 5000, f"{repr(e)}"
 
 
+def check_token(token: str) -> tuple[bool, int, Any]:
+    """校验结果按token缓存, 同一token在每个进程内只做一次签名校验"""
+    key = token_cache.key(token)
+    if (result := token_cache.get(key)) is not None:
+        return result
+
+    result = _decode_token(token)
+    if result[1] != 5000:  # 未知异常不缓存
+        token_cache.put(key, result)
+    return result
+
+
 class AuthControl:
     @classmethod
-    async def is_authed(cls, token: str = Depends(oauth2_schema)) -> User | None:
+    async def is_authed(cls, token: str = Depends(oauth2_schema)) -> Principal:
         if not token:
             raise HTTPException(code="4001", msg="Authentication failed, token does not exists in the request.")
-        user_id = CTX_USER_ID.get()
-        if user_id == 0:
+
+        principal = CTX_PRINCIPAL.get()  # APILoggerMiddleware已解析过accessToken时直接使用
+        if principal is None:
             status, code, decode_data = check_token(token)
             if not status:
                 raise HTTPException(code=code, msg=decode_data)
@@ -43,36 +60,37 @@ class AuthControl:
             if decode_data["data"]["tokenType"] != "accessToken":
                 raise HTTPException(code="4040", msg="The token is not an access token")
 
-            user_id = decode_data["data"]["userId"]
+            user_id = int(decode_data["data"]["userId"])
+            principal = await principal_cache.get(user_id)
+            if not principal:
+                raise HTTPException(code="4040", msg=f"Authentication failed, the user_id: {user_id} does not exists in the system.")
+            CTX_PRINCIPAL.set(principal)
 
-        user = await User.filter(id=user_id).first()
-        if not user:
-            raise HTTPException(code="4040", msg=f"Authentication failed, the user_id: {user_id} does not exists in the system.")
-        CTX_USER_ID.set(int(user_id))
-        return user
+        if principal.status_type == StatusType.disable:
+            raise HTTPException(code="4040", msg="This user has been disabled.")
+        CTX_USER_ID.set(principal.user_id)
+        return principal
 
 
 class PermissionControl:
     @classmethod
-    async def has_permission(cls, request: Request, current_user: User = Depends(AuthControl.is_authed)) -> None:
-        await current_user.fetch_related("by_user_roles")
-        user_roles_codes: list[str] = [r.role_code for r in current_user.by_user_roles]
-        if "R_SUPER" in user_roles_codes:  # 超级管理员
+    async def has_permission(cls, request: Request, principal: Principal = Depends(AuthControl.is_authed)) -> None:
+        if principal.is_super:  # 超级管理员
             return
 
-        if not current_user.by_user_roles:
+        if not principal.role_ids:
             raise HTTPException(code="4040", msg="The user is not bound to a role")
 
         method = request.method.lower()
         path = request.url.path
+        # Api表中记录的是路由模板
+        route_template = getattr(request.scope.get("route"), "path_format", None) or route_matcher.match(path) or path
 
-        apis = [await role.by_role_apis for role in current_user.by_user_roles]
-        permission_apis = list(set((api.api_method.value, api.api_path, api.status_type) for api in sum(apis, [])))
-        for (api_method, api_path, api_status) in permission_apis:
-            if api_method == method and check_url(api_path, request.url.path):  # API权限检测通过
-                if api_status == StatusType.disable:
-                    raise HTTPException(code="4031", msg=f"The API has been disabled, method: {method} path: {path}")
-                return
+        api_status = await permission_engine.check(principal.role_ids, method, route_template)
+        if api_status is not None:  # API权限检测通过
+            if api_status == StatusType.disable:
+                raise HTTPException(code="4031", msg=f"The API has been disabled, method: {method} path: {path}")
+            return
 
         log.error("*" * 20)
         log.error(f"Permission denied, method: {method.upper()} path: {path}")
@@ -81,5 +99,18 @@ class PermissionControl:
         raise HTTPException(code="4032", msg=f"Permission denied, method: {method} path: {path}")
 
 
+class RateLimitControl:
+    """按客户端IP限流, 在数据库操作和密码校验之前执行"""
+
+    def __init__(self, rate: str):
+        self.rate = rate
+
+    async def __call__(self, request: Request) -> None:
+        route_template = getattr(request.scope.get("route"), "path_format", None) or request.url.path
+        # 反向代理后需配置FORWARDED_ALLOW_IPS, 否则取到的是代理的IP, 所有用户共用一个额度
+        ip_address = request.client.host if request.client else "unknown"
+        await rate_limiter.hit(route_template, "ip", ip_address, self.rate)
+
+
 DependAuth = Depends(AuthControl.is_authed)
 DependPermission = Depends(PermissionControl.has_permission)
@@ -6,10 +6,10 @@ from fastapi.exceptions import (
     ResponseValidationError,
 )
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse
 from tortoise.exceptions import DoesNotExist, IntegrityError
 
 from app.core.ctx import CTX_X_REQUEST_ID
+from app.schemas.base import ORJSONResponse
 
 
 class SettingNotFound(Exception):
@@ -35,7 +35,7 @@ class HTTPException(Exception):
         return f"{class_name}(code={self.code!r}, msg={self.msg!r})"
 
 
-async def BaseHandle(req: Request, exc: Exception, handle_exc, code: int | str, msg: str | dict, status_code: int = 500, **kwargs) -> JSONResponse:
+async def BaseHandle(req: Request, exc: Exception, handle_exc, code: int | str, msg: str | dict, status_code: int = 500, **kwargs) -> ORJSONResponse:
     headers = {"x-request-id": CTX_X_REQUEST_ID.get() or ""}
     request_body = await req.body() or {}
     try:
@@ -46,26 +46,26 @@ async def BaseHandle(req: Request, exc: Exception, handle_exc, code: int | str,
     request_input = {"path": req.url.path, "query": req.query_params._dict, "body": request_body, "headers": dict(req.headers)}
     content = dict(code=str(code), x_request_id=headers["x-request-id"], msg=msg, input=request_input, **kwargs)
     if isinstance(exc, handle_exc):
-        return JSONResponse(content=content, status_code=status_code)
+        return ORJSONResponse(content=content, status_code=status_code)
     else:
-        return JSONResponse(content=dict(code=str(code), msg=f"Exception handler Error, exc: {exc}"), status_code=status_code)
+        return ORJSONResponse(content=dict(code=str(code), msg=f"Exception handler Error, exc: {exc}"), status_code=status_code)
 
 
-async def DoesNotExistHandle(req: Request, exc: Exception) -> JSONResponse:
+async def DoesNotExistHandle(req: Request, exc: Exception) -> ORJSONResponse:
     return await BaseHandle(req, exc, DoesNotExist, 404, f"Object has not found, exc: {exc}, path: {req.path_params}, query: {req.query_params}", 404)
 
 
-async def IntegrityHandle(req: Request, exc: Exception) -> JSONResponse:
+async def IntegrityHandle(req: Request, exc: Exception) -> ORJSONResponse:
     return await BaseHandle(req, exc, IntegrityError, 500, f"IntegrityError，{exc}, path: {req.path_params}, query: {req.query_params}", 500)
 
 
-async def HttpExcHandle(req: Request, exc: HTTPException) -> JSONResponse:
+async def HttpExcHandle(req: Request, exc: HTTPException) -> ORJSONResponse:
     return await BaseHandle(req, exc, HTTPException, exc.code, exc.msg, 200)
 
 
-async def RequestValidationHandle(req: Request, exc: RequestValidationError) -> JSONResponse:
+async def RequestValidationHandle(req: Request, exc: RequestValidationError) -> ORJSONResponse:
     return await BaseHandle(req, exc, RequestValidationError, 422, f"RequestValidationError", detail=exc.errors())
 
 
-async def ResponseValidationHandle(req: Request, exc: ResponseValidationError) -> JSONResponse:
+async def ResponseValidationHandle(req: Request, exc: ResponseValidationError) -> ORJSONResponse:
     return await BaseHandle(req, exc, ResponseValidationError, 422, f"ResponseValidationError", detail=exc.errors())
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta
+
+from tortoise.transactions import in_transaction
+
+from app.agents import MasterAgent
+from app.log import log
+from app.models.medical import ExecutionStatus, TestExecution
+from app.services import CampaignService
+from app.settings import APP_SETTINGS
+
+
+class ExecutionEngine:
+    """
+    测试执行引擎
+    接口只创建PENDING记录, 工作协程通过 SELECT ... FOR UPDATE SKIP LOCKED 从数据库领取执行
+    多个节点共用test_executions表作为队列, 同一条记录只会被一个工作协程领取
+    """
+
+    def __init__(
+            self,
+            workers: int,
+            poll_interval: float,
+            stale_timeout: float,
+            connection_name: str = "conn_system",
+            campaign_id: int | None = None,
+    ):
+        """
+        :param campaign_id: 只领取该批量任务的执行, 用于命令行运行单个任务
+        """
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.connection_name = connection_name
+        self.campaign_id = campaign_id
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._running: set[int] = set()  # 本节点执行中的记录id
+        self._closing = False
+
+        self.claimed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.recovered = 0
+
+    def notify(self) -> None:
+        """本节点有新的执行入队时唤醒工作协程, 其他节点靠轮询领取"""
+        self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._closing = False
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self) -> None:
+        """取消工作协程, 本节点未完成的执行标记为ERROR"""
+        self._closing = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._running:
+            await self._abort(TestExecution.filter(id__in=self._running, status=ExecutionStatus.RUNNING), "服务停止, 执行中断")
+            self._running.clear()
+
+    @staticmethod
+    async def _abort(query, error_message: str) -> int:
+        """
+        将查询到的执行标记为ERROR并计入所属批量任务
+        多个节点同时清理同一条记录时, 只有完成状态转换的节点计数
+        """
+        aborted = 0
+        for execution in await query:
+            aborted += await CampaignService.finish_execution(execution, ExecutionStatus.ERROR, error_message)
+        return aborted
+
+    async def claim(self) -> TestExecution | None:
+        """领取最早入队的一条PENDING执行, 并在同一事务中标记为RUNNING"""
+        async with in_transaction(self.connection_name) as conn:
+            query = TestExecution.filter(status=ExecutionStatus.PENDING)
+            if self.campaign_id is not None:
+                query = query.filter(campaign_id=self.campaign_id)
+            execution = await query.order_by("id").select_for_update(skip_locked=True).using_db(conn).first()
+            if execution is None:
+                return None
+
+            execution.status = ExecutionStatus.RUNNING
+            execution.start_time = datetime.now()
+            execution.worker_id = self.worker_id
+            await execution.save(using_db=conn, update_fields=["status", "start_time", "worker_id", "update_time"])
+
+        self.claimed += 1
+        return execution
+
+    async def _worker(self) -> None:
+        while not self._closing:
+            try:
+                execution = await self.claim()
+            except Exception as e:
+                log.error(f"ExecutionEngine claim failed, exc: {e!r}")
+                execution = None
+
+            if execution is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    ...
+                continue
+
+            try:
+                await self._run(execution)
+            except Exception as e:  # 记录结束状态失败时工作协程继续运行, 该记录由sweeper超时处理
+                log.error(f"ExecutionEngine worker error, execution: {execution.execution_id}, exc: {e!r}")
+
+    async def _run(self, execution: TestExecution) -> None:
+        self._running.add(execution.id)
+        try:
+            master = MasterAgent()
+            await master.initialize()
+            await master.run_execution(execution)  # 结束状态由run_execution条件更新并计入批量任务
+            self.succeeded += 1
+        except Exception as e:
+            self.failed += 1
+            log.error(f"ExecutionEngine execution {execution.execution_id} failed, exc: {e!r}")
+            # 初始化失败时run_execution未运行; 已结束的记录条件更新不会生效
+            await CampaignService.finish_execution(execution, ExecutionStatus.ERROR, str(e))
+        finally:
+            if not self._closing:  # 被stop取消时保留在_running中, 由stop标记为ERROR
+                self._running.discard(execution.id)
+
+    async def _sweeper(self) -> None:
+        """
+        定期为本节点执行中的记录更新update_time作为心跳
+        所属节点异常退出时心跳停止, 超过stale_timeout未更新的RUNNING记录标记为ERROR
+        """
+        while not self._closing:
+            try:
+                if self._running:
+                    await TestExecution.filter(id__in=self._running, status=ExecutionStatus.RUNNING).update(update_time=datetime.now())
+                deadline = datetime.now() - timedelta(seconds=self.stale_timeout)
+                recovered = await self._abort(TestExecution.filter(status=ExecutionStatus.RUNNING, update_time__lt=deadline), "执行超时")
+                if recovered:
+                    self.recovered += recovered
+                    log.warning(f"ExecutionEngine marked {recovered} stale executions as error")
+            except Exception as e:
+                log.error(f"ExecutionEngine sweep failed, exc: {e!r}")
+            await asyncio.sleep(min(self.stale_timeout / 3, 60))  # 心跳间隔小于超时时间
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "workerId": self.worker_id,
+            "workers": self.workers,
+            "running": len(self._running),
+            "claimed": self.claimed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "recovered": self.recovered,
+        }
+
+
+execution_engine = ExecutionEngine(
+    workers=APP_SETTINGS.EXECUTION_WORKERS,
+    poll_interval=APP_SETTINGS.EXECUTION_POLL_INTERVAL,
+    stale_timeout=APP_SETTINGS.EXECUTION_STALE_TIMEOUT,
+)
@@ -0,0 +1,115 @@
+import asyncio
+import importlib.util
+from collections.abc import Awaitable
+from typing import Any, TypeVar
+
+import httpx
+
+from app.log import log
+from app.settings import APP_SETTINGS
+
+T = TypeVar("T")
+
+
+class HttpClientPool:
+    """
+    进程内共享的httpx.AsyncClient
+    连接池复用TCP/TLS连接, 每轮对话不再重新握手; 首次使用时创建, 生命周期结束时关闭
+    测试时可用use()替换为指向本地服务的客户端
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            max_connections: int,
+            max_keepalive_connections: int,
+            keepalive_expiry: float,
+            http2: bool,
+            connect_timeout: float,
+            read_timeout: float,
+            total_timeout: float,
+    ):
+        self.base_url = base_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(connect=connect_timeout, read=read_timeout, write=read_timeout, pool=connect_timeout)
+        self.total_timeout = total_timeout
+        self.http2 = http2 and self._http2_available()
+
+        self._client: httpx.AsyncClient | None = None
+
+        self.clients = 0
+        self.requests = 0
+        self.errors = 0
+
+    @staticmethod
+    def _http2_available() -> bool:
+        if importlib.util.find_spec("h2") is None:
+            log.warning("HTTP_CLIENT_HTTP2 is enabled but h2 is not installed, falling back to HTTP/1.1")
+            return False
+        return True
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                event_hooks={"request": [self._on_request], "response": [self._on_response]},
+            )
+            self.clients += 1
+        return self._client
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        if response.is_error:
+            self.errors += 1
+
+    def use(self, client: httpx.AsyncClient) -> None:
+        """替换共享客户端, 原客户端由调用方负责关闭"""
+        self._client = client
+
+    def deadline(self) -> float:
+        """本次调用的截止时间(事件循环时间), 用于流式响应逐行检查总超时"""
+        return asyncio.get_running_loop().time() + self.total_timeout
+
+    async def with_total_timeout(self, awaitable: Awaitable[T]) -> T:
+        """连接/读取超时只限制单次操作, 总超时限制整个请求"""
+        try:
+            return await asyncio.wait_for(awaitable, timeout=self.total_timeout)
+        except asyncio.TimeoutError:
+            self.errors += 1
+            raise httpx.TimeoutException(f"Request exceeded total timeout {self.total_timeout}s")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "maxConnections": self.limits.max_connections,
+            "clients": self.clients,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+doctor_http_client = HttpClientPool(
+    base_url=APP_SETTINGS.DOCTOR_API_BASE_URL,
+    max_connections=APP_SETTINGS.HTTP_CLIENT_MAX_CONNECTIONS,
+    max_keepalive_connections=APP_SETTINGS.HTTP_CLIENT_MAX_KEEPALIVE,
+    keepalive_expiry=APP_SETTINGS.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    http2=APP_SETTINGS.HTTP_CLIENT_HTTP2,
+    connect_timeout=APP_SETTINGS.HTTP_CLIENT_CONNECT_TIMEOUT,
+    read_timeout=APP_SETTINGS.HTTP_CLIENT_READ_TIMEOUT,
+    total_timeout=APP_SETTINGS.HTTP_CLIENT_TOTAL_TIMEOUT,
+)
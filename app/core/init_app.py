@@ -1,3 +1,5 @@
+from pathlib import Path
+
 from aerich import Command
 from fastapi import FastAPI
 from fastapi.middleware import Middleware
@@ -96,8 +98,13 @@ async def modify_db():
             await Tortoise.close_connections()
             
             # 初始化 aerich 迁移系统
-            await command.init_db(safe=True)
-            await command.init()
+            if any(Path(command.location, "app_system").glob("*.py")):
+                # 已有迁移文件时init_db会报错; 表结构已包含迁移内容, upgrade只记录版本(迁移SQL可重复执行)
+                await command.init()
+                await command.upgrade(run_in_transaction=True)
+            else:
+                await command.init_db(safe=True)
+                await command.init()
         except Exception as e:
             from app.log import log
             log.warning(f"Database initialization warning: {e}")
@@ -112,6 +119,7 @@ async def modify_db():
         # 已有数据库：只执行 upgrade，不执行 migrate（避免版本兼容性警告）
         # migrate() 会在模型变更时手动执行，这里只应用已有的迁移
         try:
+            await command.init()  # 设置迁移目录, 否则upgrade不会执行任何迁移
             await command.upgrade(run_in_transaction=True)
         except AttributeError as e:
             # 忽略 aerich 版本兼容性警告（如 'migrate_location' 属性不存在）
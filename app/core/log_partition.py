@@ -0,0 +1,201 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+
+from app.log import log
+from app.settings import APP_SETTINGS
+
+PARTITIONED_TABLES = ("api_logs", "logs")
+
+
+class LogPartitionManager:
+    """
+    日志表按create_time范围分区(PostgreSQL)
+    启动时把普通表转换为分区表, 定时创建未来分区, 按保留数量分离或删除整个历史分区
+    """
+
+    def __init__(
+            self,
+            interval: str,
+            premake: int,
+            retention: int,
+            retention_action: str,
+            maintain_interval: int,
+            connection_name: str = "conn_system",
+    ):
+        if interval not in ("day", "month"):
+            raise ValueError(f"Unsupported partition interval: {interval}")
+        if retention_action not in ("drop", "detach"):
+            raise ValueError(f"Unsupported partition retention action: {retention_action}")
+
+        self.interval = interval
+        self.premake = premake
+        self.retention = retention
+        self.retention_action = retention_action
+        self.maintain_interval = maintain_interval
+        self.connection_name = connection_name
+        self._task: asyncio.Task | None = None
+
+    def floor(self, dt: datetime) -> datetime:
+        if self.interval == "day":
+            return datetime(dt.year, dt.month, dt.day)
+        return datetime(dt.year, dt.month, 1)
+
+    def next_bound(self, dt: datetime) -> datetime:
+        if self.interval == "day":
+            return dt + timedelta(days=1)
+        return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1)
+
+    def partition_name(self, table: str, lower: datetime) -> str:
+        suffix = lower.strftime("%Y%m%d") if self.interval == "day" else lower.strftime("%Y%m")
+        return f"{table}_p{suffix}"
+
+    def parse_partition_name(self, table: str, partition: str) -> datetime | None:
+        suffix = partition.removeprefix(f"{table}_p")
+        try:
+            return datetime.strptime(suffix, "%Y%m%d" if self.interval == "day" else "%Y%m")
+        except ValueError:
+            return None
+
+    async def is_partitioned(self, conn, table: str) -> bool | None:
+        """
+        :return: None为表不存在
+        """
+        _, rows = await conn.execute_query("SELECT relkind FROM pg_class WHERE relname = $1 AND relkind IN ('r', 'p')", [table])
+        if not rows:
+            return None
+        return rows[0]["relkind"] == "p"
+
+    async def convert_table(self, conn, table: str) -> None:
+        """
+        把普通表转换为分区表, 主键变为(id, create_time), 需在maintain_table的事务中调用
+        分区表上无法保留单列唯一约束, 因此logs.api_log_id的唯一约束及两张表之间的外键不再保留, 关联关系由ORM维护
+        指向其他表的外键(如logs.by_user_id)在分区表上重新创建
+        """
+        legacy = f"{table}_legacy"
+        _, indexes = await conn.execute_query(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = $1 AND indexdef NOT LIKE 'CREATE UNIQUE%'", [table]
+        )
+        _, foreign_keys = await conn.execute_query(
+            "SELECT c.conname, pg_get_constraintdef(c.oid) AS condef FROM pg_constraint c "
+            "JOIN pg_class t ON t.oid = c.conrelid JOIN pg_class r ON r.oid = c.confrelid "
+            "WHERE c.contype = 'f' AND t.relname = $1 AND r.relname <> ALL($2::text[])",
+            [table, list(PARTITIONED_TABLES)],
+        )
+        await conn.execute_script(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+        _, rows = await conn.execute_query(f"SELECT pg_get_serial_sequence('{legacy}', 'id') AS seq, min(create_time) AS min_time FROM \"{legacy}\"")
+        sequence, min_time = rows[0]["seq"], rows[0]["min_time"]
+
+        await conn.execute_script(
+            f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS) PARTITION BY RANGE (create_time);'
+            f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, create_time);'
+            f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT;'
+        )
+        if sequence:
+            await conn.execute_script(f'ALTER SEQUENCE {sequence} OWNED BY "{table}".id')
+
+        await self.create_partitions(conn, table, min_time or datetime.now())
+        await conn.execute_script(
+            f'INSERT INTO "{table}" SELECT * FROM "{legacy}";'
+            f'DROP TABLE "{legacy}" CASCADE;'
+        )
+        for index in indexes:
+            await conn.execute_script(index["indexdef"].replace(f"public.{table} ", f'"{table}" ', 1))
+        for foreign_key in foreign_keys:
+            await conn.execute_script(f'ALTER TABLE "{table}" ADD CONSTRAINT "{foreign_key["conname"]}" {foreign_key["condef"]}')
+
+        log.info(f"日志表 {table} 已转换为按{self.interval}分区")
+
+    async def create_partitions(self, conn, table: str, start: datetime) -> None:
+        lower = self.floor(start)
+        end = self.floor(datetime.now())
+        for _ in range(self.premake):
+            end = self.next_bound(end)
+
+        while lower <= end:
+            upper = self.next_bound(lower)
+            await conn.execute_script(
+                f'CREATE TABLE IF NOT EXISTS "{self.partition_name(table, lower)}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+            )
+            lower = upper
+
+    async def apply_retention(self, conn, table: str) -> None:
+        if self.retention <= 0:
+            return
+
+        threshold = self.floor(datetime.now())
+        for _ in range(self.retention):
+            threshold = self.floor(threshold - timedelta(days=1))
+
+        _, rows = await conn.execute_query(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = $1", [table]
+        )
+        for row in rows:
+            partition = row["relname"]
+            lower = self.parse_partition_name(table, partition)
+            if lower is None or self.next_bound(lower) > threshold:
+                continue
+
+            await conn.execute_script(f'ALTER TABLE "{table}" DETACH PARTITION "{partition}"')
+            if self.retention_action == "drop":
+                await conn.execute_script(f'DROP TABLE "{partition}"')
+            log.info(f"日志分区 {partition} 已{'删除' if self.retention_action == 'drop' else '分离'}")
+
+    async def maintain(self) -> None:
+        conn = Tortoise.get_connection(self.connection_name)
+        if conn.capabilities.dialect != "postgres":
+            log.warning("日志表分区仅支持PostgreSQL, 已跳过")
+            return
+
+        for table in PARTITIONED_TABLES:
+            await self.maintain_table(table)
+
+    async def maintain_table(self, table: str) -> None:
+        """
+        多个worker同时启动时, 通过咨询锁串行维护同一张表
+        拿到锁后重新检查是否已分区, 后拿到锁的worker跳过转换
+        """
+        async with in_transaction(self.connection_name) as conn:
+            await conn.execute_query("SELECT pg_advisory_xact_lock(hashtext($1))", [f"log_partition:{table}"])
+            partitioned = await self.is_partitioned(conn, table)
+            if partitioned is None:
+                return
+            if not partitioned:
+                await self.convert_table(conn, table)
+            await self.create_partitions(conn, table, datetime.now())
+            await self.apply_retention(conn, table)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.maintain_interval)
+            try:
+                await self.maintain()
+            except Exception as e:
+                log.error(f"日志分区维护失败: {e!r}")
+
+    async def start(self) -> None:
+        await self.maintain()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                ...
+            self._task = None
+
+
+log_partition_manager = LogPartitionManager(
+    interval=APP_SETTINGS.LOG_PARTITION_INTERVAL,
+    premake=APP_SETTINGS.LOG_PARTITION_PREMAKE,
+    retention=APP_SETTINGS.LOG_PARTITION_RETENTION,
+    retention_action=APP_SETTINGS.LOG_PARTITION_RETENTION_ACTION,
+    maintain_interval=APP_SETTINGS.LOG_PARTITION_MAINTAIN_INTERVAL,
+)
@@ -0,0 +1,89 @@
+import random
+import time
+
+from app.settings import APP_SETTINGS
+
+
+class LogSampler:
+    """
+    API日志采样
+    错误响应、慢请求、每个用户每分钟的前N个请求始终记录, 其余按路由模板的采样率记录
+    """
+
+    def __init__(
+            self,
+            default_rate: float,
+            route_rates: dict[str, float],
+            slow_threshold: float,
+            user_burst: int,
+            success_codes: list[str],
+    ):
+        self.default_rate = default_rate
+        self.route_rates = route_rates
+        self.slow_threshold = slow_threshold
+        self.user_burst = user_burst
+        self.success_codes = set(success_codes)
+
+        self._window = 0
+        self._user_counts: dict[int, int] = {}
+
+        self.kept = 0
+        self.dropped = 0
+        self.kept_error = 0
+        self.kept_slow = 0
+        self.kept_user_burst = 0
+
+    def is_error(self, status_code: int | None, response_code: str | None) -> bool:
+        return (status_code or 0) >= 400 or (response_code is not None and response_code not in self.success_codes)
+
+    def _hit_user_burst(self, user_id: int | None) -> bool:
+        if not user_id or self.user_burst <= 0:
+            return False
+
+        window = int(time.monotonic() // 60)
+        if window != self._window:  # 每分钟重置计数, 内存只与当前分钟内的活跃用户数相关
+            self._window = window
+            self._user_counts = {}
+
+        count = self._user_counts.get(user_id, 0)
+        self._user_counts[user_id] = count + 1
+        return count < self.user_burst
+
+    def should_log(
+            self,
+            route_template: str,
+            status_code: int | None,
+            response_code: str | None,
+            process_time: float,
+            user_id: int | None,
+    ) -> bool:
+        if self.is_error(status_code, response_code):
+            self.kept_error += 1
+        elif process_time >= self.slow_threshold:
+            self.kept_slow += 1
+        elif self._hit_user_burst(user_id):
+            self.kept_user_burst += 1
+        elif random.random() >= self.route_rates.get(route_template, self.default_rate):
+            self.dropped += 1
+            return False
+
+        self.kept += 1
+        return True
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "kept": self.kept,
+            "dropped": self.dropped,
+            "keptError": self.kept_error,
+            "keptSlow": self.kept_slow,
+            "keptUserBurst": self.kept_user_burst,
+        }
+
+
+log_sampler = LogSampler(
+    default_rate=APP_SETTINGS.API_LOG_SAMPLE_RATE,
+    route_rates=APP_SETTINGS.API_LOG_SAMPLE_RULES,
+    slow_threshold=APP_SETTINGS.API_LOG_SLOW_THRESHOLD,
+    user_burst=APP_SETTINGS.API_LOG_USER_BURST,
+    success_codes=APP_SETTINGS.API_LOG_SUCCESS_CODES,
+)
@@ -0,0 +1,120 @@
+import asyncio
+from collections import deque
+from typing import Any
+
+from app.log import log
+from app.models.system import Log, APILog
+from app.settings import APP_SETTINGS
+
+
+class LogWriter:
+    """
+    日志异步批量写入
+    请求链路只负责入队, 后台任务按批量大小或时间间隔批量落库, 关闭时排空队列
+    """
+
+    def __init__(self, max_size: int, batch_size: int, flush_interval: float):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: deque[tuple[dict[str, Any], dict[str, Any] | None]] = deque()
+        self._batch_ready = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.peak_size = 0
+
+    def put_log(self, **log_data) -> bool:
+        """日志入队, 参数与Log模型字段一致"""
+        return self._put(log_data, None)
+
+    def put_api_log(self, api_log_data: dict[str, Any], log_data: dict[str, Any]) -> bool:
+        """API日志入队, 请求与响应合并为一行写入, 通过x_request_id关联Log"""
+        return self._put(log_data, api_log_data)
+
+    def _put(self, log_data: dict[str, Any], api_log_data: dict[str, Any] | None) -> bool:
+        if len(self._queue) >= self.max_size:
+            self.dropped += 1
+            return False
+
+        self._queue.append((log_data, api_log_data))
+        self.enqueued += 1
+        self.peak_size = max(self.peak_size, len(self._queue))
+        if len(self._queue) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务并写入剩余日志"""
+        if self._task is not None:
+            self._closing = True
+            self._batch_ready.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                ...
+            self._batch_ready.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            try:
+                await self._write(batch)
+                self.written += len(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                log.error(f"批量写入日志失败, 丢弃 {len(batch)} 条: {e!r}")
+            self.batches += 1
+
+    @staticmethod
+    async def _write(batch: list[tuple[dict[str, Any], dict[str, Any] | None]]) -> None:
+        api_log_datas = [api_log_data for _, api_log_data in batch if api_log_data]
+        api_log_ids: dict[str, int] = {}
+        if api_log_datas:
+            await APILog.bulk_create([APILog(**api_log_data) for api_log_data in api_log_datas])
+            x_request_ids = [api_log_data["x_request_id"] for api_log_data in api_log_datas]
+            api_log_ids = dict(await APILog.filter(x_request_id__in=x_request_ids).values_list("x_request_id", "id"))
+
+        log_objs = []
+        for log_data, api_log_data in batch:
+            if api_log_data:
+                log_data = dict(log_data, api_log_id=api_log_ids.get(api_log_data["x_request_id"]))
+            log_objs.append(Log(**log_data))
+        await Log.bulk_create(log_objs)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queueSize": len(self._queue),
+            "queueMaxSize": self.max_size,
+            "peakSize": self.peak_size,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+log_writer = LogWriter(
+    max_size=APP_SETTINGS.LOG_QUEUE_MAX_SIZE,
+    batch_size=APP_SETTINGS.LOG_BATCH_SIZE,
+    flush_interval=APP_SETTINGS.LOG_FLUSH_INTERVAL,
+)
@@ -0,0 +1,79 @@
+import time
+
+from app.core.route_cache import route_cache
+from app.models.system import Menu
+from app.settings import APP_SETTINGS
+
+
+class MenuAncestry:
+    """
+    菜单祖先索引
+    一次查询加载全部菜单的 (id, parent_id), 为每个菜单计算祖先路径(由近到远的菜单id)
+    菜单增删改时调用invalidate清空; 其他进程的变更通过route_cache的全局版本号发现,
+    与路由缓存使用同一个版本, 避免用旧的祖先路径生成新版本的路由缓存. Redis不可用时由TTL兜底
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._paths: dict[int, tuple[int, ...]] | None = None
+        self._expires_at = 0.0
+        self._version: int | None = None
+        self._generation = 0
+
+        self.loads = 0
+        self.invalidations = 0
+
+    def invalidate(self) -> None:
+        self._paths = None
+        self._generation += 1
+        self.invalidations += 1
+
+    @staticmethod
+    def _build_paths(parents: dict[int, int]) -> dict[int, tuple[int, ...]]:
+        paths: dict[int, tuple[int, ...]] = {}
+        for menu_id in parents:
+            path: list[int] = []
+            parent_id = parents[menu_id]
+            while parent_id in parents and parent_id != menu_id and parent_id not in path:  # 跳过不存在的父菜单和环
+                if parent_id in paths:  # 复用已计算的上级路径
+                    path.append(parent_id)
+                    path.extend(paths[parent_id])
+                    break
+                path.append(parent_id)
+                parent_id = parents[parent_id]
+            paths[menu_id] = tuple(path)
+        return paths
+
+    async def get_paths(self) -> dict[int, tuple[int, ...]]:
+        now = time.monotonic()
+        version = await route_cache.global_version()
+        if self._paths is not None and now < self._expires_at and version == self._version:
+            return self._paths
+
+        generation = self._generation
+        parents = dict(await Menu.all().values_list("id", "parent_id"))
+        paths = self._build_paths(parents)
+        self.loads += 1
+        if generation == self._generation:  # 加载期间发生变更时不写入缓存
+            self._paths = paths
+            self._expires_at = now + self.ttl
+            self._version = version
+        return paths
+
+    async def with_ancestors(self, menu_ids: set[int] | list[int]) -> set[int]:
+        """返回menu_ids及其所有上级菜单的id"""
+        paths = await self.get_paths()
+        result = set(menu_ids)
+        for menu_id in menu_ids:
+            result.update(paths.get(menu_id, ()))
+        return result
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "menus": len(self._paths) if self._paths is not None else 0,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+        }
+
+
+menu_ancestry = MenuAncestry(ttl=APP_SETTINGS.MENU_ANCESTRY_CACHE_TTL)
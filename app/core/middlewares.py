@@ -1,19 +1,23 @@
-from uuid import uuid4
+import hashlib
+import re
 from datetime import datetime
-from json import JSONDecodeError
+from enum import Enum
+from uuid import uuid4
 
 import orjson
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.bgtask import BgTasks
-from app.core.ctx import CTX_X_REQUEST_ID, CTX_USER_ID
+from app.core.ctx import CTX_PRINCIPAL, CTX_X_REQUEST_ID, CTX_USER_ID
 from app.core.dependency import check_token
 from app.core.exceptions import HTTPException
+from app.core.log_sampler import log_sampler
+from app.core.log_writer import log_writer
+from app.core.principal import principal_cache
 from app.models.system import LogType
-from app.models.system import User, Log, APILog
 from app.settings import APP_SETTINGS
+from app.utils.route_matcher import route_matcher
 
 
 class SimpleBaseMiddleware:
@@ -53,54 +57,170 @@ class BackGroundTaskMiddleware(SimpleBaseMiddleware):
         await BgTasks.execute_tasks()
 
 
-class APILoggerMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class LogPathMatcher:
+    """
+    预编译的日志路径匹配规则, 保持ADD_LOG_ORIGINS_INCLUDE/DECLUDE的子串匹配语义
+    """
+
+    def __init__(self, include: list[str], exclude: list[str]):
+        self.include_all = "*" in include
+        self.include_pattern = self._compile([item for item in include if item != "*"])
+        self.exclude_pattern = self._compile(exclude)
+
+    @staticmethod
+    def _compile(items: list[str]) -> re.Pattern | None:
+        if not items:
+            return None
+        return re.compile("|".join(re.escape(item) for item in items))
+
+    def __call__(self, path: str) -> bool:
+        if self.exclude_pattern and self.exclude_pattern.search(path):
+            return False
+        return self.include_all or bool(self.include_pattern and self.include_pattern.search(path))
+
+
+class APILoggerMiddleware(SimpleBaseMiddleware):
+    def __init__(self, app: ASGIApp) -> None:
+        super().__init__(app)
+        self.path_matcher = LogPathMatcher(APP_SETTINGS.ADD_LOG_ORIGINS_INCLUDE, APP_SETTINGS.ADD_LOG_ORIGINS_DECLUDE)
+
+    async def handle_http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request = Request(scope)
         request.state.start_time = datetime.now()
-        path = request.url.path
         x_request_id = uuid4().hex
         CTX_X_REQUEST_ID.set(x_request_id)
+        CTX_USER_ID.set(0)
+        CTX_PRINCIPAL.set(None)
         request.state.x_request_id = x_request_id
-        if (
-                all([declude not in path for declude in APP_SETTINGS.ADD_LOG_ORIGINS_DECLUDE])
-                and (
-                "*" in APP_SETTINGS.ADD_LOG_ORIGINS_INCLUDE
-                or any([include in path for include in APP_SETTINGS.ADD_LOG_ORIGINS_INCLUDE]))
-        ):
-            if request.scope["type"] == "http":
-                token = request.headers.get("Authorization")
-                user_obj = None
-                if token:
-                    status, _, decode_data = check_token(token.replace("Bearer ", "", 1))
-                    if status and decode_data:
-                        user_id = int(decode_data["data"]["userId"])
-                        user_obj = await User.filter(id=user_id).first()
-                        if user_obj:
-                            CTX_USER_ID.set(user_id)
-                try:
-                    request_data = await request.json() if request.method in ["POST", "PUT", "PATCH"] else None
-                except (JSONDecodeError, UnicodeDecodeError):
-                    request_data = None
 
-                url = str(request.url.path)
-                if len(url) > 500:
-                    raise HTTPException(msg="请求url path过长, 请联系开发人员", code="4001")
+        path = scope["path"]
+        if not self.path_matcher(path):
+            await self.app(scope, receive, send)
+            return
+
+        token = request.headers.get("Authorization")
+        principal = None
+        if token:
+            status, _, decode_data = check_token(token.replace("Bearer ", "", 1))
+            if status and decode_data:
+                principal = await principal_cache.get(int(decode_data["data"]["userId"]))
+                if principal:
+                    CTX_USER_ID.set(principal.user_id)
+                    if decode_data["data"].get("tokenType") == "accessToken":  # 供AuthControl直接使用, 不再重复解析
+                        CTX_PRINCIPAL.set(principal)
+
+        if len(path) > 500:
+            raise HTTPException(msg="请求url path过长, 请联系开发人员", code="4001")
+
+        # 请求与响应合并为一行, 在响应结束后由APILoggerAddResponseMiddleware入队写入
+        request.state.api_log_data = dict(
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            request_domain=request.url.hostname,
+            request_path=path,
+            request_params=dict(request.query_params) or None,
+            request_data=None,
+            x_request_id=x_request_id,
+            create_time=request.state.start_time,
+        )
+        request.state.log_data = dict(
+            log_type=LogType.ApiLog,
+            by_user_id=principal.user_id if principal else None,
+            x_request_id=x_request_id,
+            create_time=request.state.start_time,
+        )
+
+        if request.method not in ("POST", "PUT", "PATCH") or "json" not in request.headers.get("content-type", ""):
+            await self.app(scope, receive, send)
+            return
+
+        # 请求体在流向应用时同步留存一份, 不再提前读取整个请求体
+        request_body = bytearray()
+        request.state.request_body = request_body
 
-                api_log_data = dict(
-                    ip_address=request.client.host if request.client else None,
-                    user_agent=request.headers.get("user-agent"),
-                    request_domain=request.url.hostname,
-                    request_path=request.url.path,
-                    request_params=dict(request.query_params) or None,
-                    request_data=request_data,
-                    x_request_id=x_request_id,
-                )
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.extend(message.get("body", b""))
+            return message
 
-                api_log_obj = await APILog.create(**api_log_data)
-                request.state.api_log_id = api_log_obj.id
-                await Log.create(log_type=LogType.ApiLog, by_user=user_obj, api_log=api_log_obj, x_request_id=x_request_id)
+        await self.app(scope, receive_wrapper, send)
 
-        response = await call_next(request)
-        return response
+
+class ResponseLogMode(str, Enum):
+    body = "body"  # 记录响应体(超出上限时只记录摘要)
+    code = "code"  # 只记录业务状态码
+    headers = "headers"  # 记录状态码与响应头
+
+
+class ResponseCapture:
+    """
+    按块收集响应体, 超出字节上限后改为增量计算摘要, 保证单行日志大小和解析开销有上限
+    """
+    CODE_PATTERN = re.compile(rb'"code"\s*:\s*"?([\w-]{1,6})')
+    HEAD_SIZE = 256
+
+    def __init__(self, mode: ResponseLogMode, max_bytes: int):
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.status_code: int | None = None
+        self.headers: dict[str, str] | None = None
+        self.size = 0
+        self.head = b""
+        self.chunks: list[bytes] = []
+        self.digest = None
+
+    def start(self, message: Message) -> None:
+        self.status_code = message.get("status")
+        if self.mode == ResponseLogMode.headers:
+            self.headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in message.get("headers", [])}
+
+    def feed(self, body: bytes) -> None:
+        if not body:
+            return
+        if len(self.head) < self.HEAD_SIZE:
+            self.head += body[:self.HEAD_SIZE - len(self.head)]
+        self.size += len(body)
+        if self.mode != ResponseLogMode.body:
+            return
+
+        if self.digest is not None:
+            self.digest.update(body)
+            return
+        self.chunks.append(body)
+        if self.size > self.max_bytes:
+            self.digest = hashlib.sha256(b"".join(self.chunks))
+            self.chunks = []
+
+    def sniff_code(self) -> str | None:
+        if match := self.CODE_PATTERN.search(self.head):
+            return match.group(1).decode()
+        return None
+
+    def result(self) -> tuple[dict | list | None, str | None]:
+        """
+        :return: (response_data, response_code)
+        """
+        if self.mode == ResponseLogMode.headers:
+            return {"status": self.status_code, "headers": self.headers, "size": self.size}, self.sniff_code()
+
+        if self.mode == ResponseLogMode.code:
+            return None, self.sniff_code()
+
+        if self.digest is not None:
+            truncated = {
+                "truncated": True,
+                "size": self.size,
+                "sha256": self.digest.hexdigest(),
+                "head": self.head.decode("utf-8", errors="replace"),
+            }
+            return truncated, self.sniff_code()
+
+        try:
+            resp = orjson.loads(b"".join(self.chunks))
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            return None, None
+        return resp, resp.get("code", "-1") if isinstance(resp, dict) else None
 
 
 class APILoggerAddResponseMiddleware(SimpleBaseMiddleware):
@@ -108,20 +228,59 @@ class APILoggerAddResponseMiddleware(SimpleBaseMiddleware):
     需要与APILoggerMiddleware搭配使用
     """
 
+    def __init__(self, app: ASGIApp) -> None:
+        super().__init__(app)
+        # 按前缀长度倒序, 最长前缀优先
+        self.response_rules = sorted(
+            ((prefix, ResponseLogMode(mode)) for prefix, mode in APP_SETTINGS.API_LOG_RESPONSE_RULES.items()),
+            key=lambda rule: len(rule[0]),
+            reverse=True,
+        )
+        self.default_mode = ResponseLogMode(APP_SETTINGS.API_LOG_RESPONSE_DEFAULT_MODE)
+
+    def get_response_mode(self, path: str) -> ResponseLogMode:
+        for prefix, mode in self.response_rules:
+            if path.startswith(prefix):
+                return mode
+        return self.default_mode
+
     async def after_request(self, request: Request, response: dict) -> None:
-        if response.get("type") == "http.response.body" and hasattr(request.state, "api_log_id"):
-            response_body = response.get("body", b"")
-            try:
-                resp = orjson.loads(response_body)
-                api_log_obj = await APILog.get(id=request.state.api_log_id)
-                if api_log_obj:
-                    api_log_obj.response_data = resp
-                    api_log_obj.response_code = resp.get("code", "-1")
-                    api_log_obj.process_time = (datetime.now() - request.state.start_time).total_seconds()
-                    await api_log_obj.save()
-
-            except (orjson.JSONDecodeError, UnicodeDecodeError):
-                ...
-
-        if response.get("type") == "http.response.start" and hasattr(request.state, "x_request_id"):
-            response["headers"].append((b"x-request-id", request.state.x_request_id.encode()))
+        if response.get("type") == "http.response.start":
+            if hasattr(request.state, "api_log_data"):
+                capture = ResponseCapture(self.get_response_mode(request.url.path), APP_SETTINGS.API_LOG_RESPONSE_MAX_BYTES)
+                capture.start(response)
+                request.state.response_capture = capture
+            if hasattr(request.state, "x_request_id"):
+                response["headers"].append((b"x-request-id", request.state.x_request_id.encode()))
+
+        elif response.get("type") == "http.response.body" and hasattr(request.state, "response_capture"):
+            capture: ResponseCapture = request.state.response_capture
+            capture.feed(response.get("body", b""))
+            if response.get("more_body", False):
+                return
+
+            api_log_data: dict = request.state.api_log_data
+            log_data: dict = request.state.log_data
+            del request.state.api_log_data
+            del request.state.response_capture
+
+            # 先用响应体开头的业务状态码做采样判断, 被采样丢弃的请求不再解析完整响应体
+            process_time = (datetime.now() - request.state.start_time).total_seconds()
+            route_template = getattr(request.scope.get("route"), "path_format", None) or route_matcher.match(request.url.path)
+            if not log_sampler.should_log(
+                    route_template or request.url.path, capture.status_code, capture.sniff_code(), process_time, log_data["by_user_id"]
+            ):
+                return
+
+            response_data, response_code = capture.result()
+
+            if request_body := getattr(request.state, "request_body", None):
+                try:
+                    api_log_data["request_data"] = orjson.loads(request_body)
+                except (orjson.JSONDecodeError, UnicodeDecodeError):
+                    ...
+            api_log_data["route_template"] = route_template
+            api_log_data["response_data"] = response_data
+            api_log_data["response_code"] = response_code
+            api_log_data["process_time"] = process_time
+            log_writer.put_api_log(api_log_data, log_data)
@@ -0,0 +1,81 @@
+import time
+
+from app.models.system import Api, StatusType
+from app.settings import APP_SETTINGS
+
+Grants = dict[tuple[str, str], StatusType]
+
+
+class PermissionEngine:
+    """
+    API权限缓存
+    每个角色的API授权编译为 (请求方法, 路由模板) -> API状态 的字典, 按角色组合合并缓存
+    角色/API授权变更时调用invalidate清空, TTL兜底多进程部署下其他进程的变更
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._role_grants: dict[int, Grants] = {}
+        self._role_set_grants: dict[frozenset[int], Grants] = {}
+        self._expires_at = 0.0
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def invalidate(self) -> None:
+        self._role_grants = {}
+        self._role_set_grants = {}
+        self._generation += 1
+        self.invalidations += 1
+
+    async def _load_roles(self, role_ids: list[int]) -> dict[int, Grants]:
+        grants: dict[int, Grants] = {role_id: {} for role_id in role_ids}
+        rows = await Api.filter(by_api_roles__id__in=role_ids).values_list("by_api_roles__id", "api_method", "api_path", "status_type")
+        for role_id, api_method, api_path, status_type in rows:
+            grants[role_id][(api_method.value, api_path)] = status_type
+        return grants
+
+    async def get_grants(self, role_ids: frozenset[int]) -> Grants:
+        now = time.monotonic()
+        if now >= self._expires_at:
+            self.invalidate()
+            self._expires_at = now + self.ttl
+
+        if (grants := self._role_set_grants.get(role_ids)) is not None:
+            self.hits += 1
+            return grants
+
+        self.misses += 1
+        generation = self._generation
+        role_grants = {role_id: self._role_grants[role_id] for role_id in role_ids if role_id in self._role_grants}
+        if missing := [role_id for role_id in role_ids if role_id not in role_grants]:
+            role_grants.update(await self._load_roles(missing))
+
+        grants = {}
+        for role_id in role_ids:
+            grants.update(role_grants[role_id])
+
+        if generation == self._generation:  # 加载期间发生变更时不写入缓存
+            self._role_grants.update(role_grants)
+            self._role_set_grants[role_ids] = grants
+        return grants
+
+    async def check(self, role_ids: frozenset[int], method: str, route_template: str) -> StatusType | None:
+        """
+        :return: 有权限时返回API状态, 无权限返回None
+        """
+        grants = await self.get_grants(role_ids)
+        return grants.get((method, route_template))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "roleSets": len(self._role_set_grants),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+permission_engine = PermissionEngine(ttl=APP_SETTINGS.PERMISSION_CACHE_TTL)
@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass
+
+from app.models.system import User, StatusType
+from app.settings import APP_SETTINGS
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """当前请求的用户身份, 每个请求只解析一次, 通过CTX_PRINCIPAL共享"""
+    user_id: int
+    user_name: str
+    status_type: StatusType
+    role_ids: frozenset[int]
+    role_codes: tuple[str, ...]
+
+    @property
+    def is_super(self) -> bool:
+        return "R_SUPER" in self.role_codes
+
+
+class PrincipalCache:
+    """
+    用户身份短期缓存, 一次联表查询取出用户状态和角色
+    用户/角色写入时失效, TTL兜底多进程部署下其他进程的变更
+    """
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache: dict[int, tuple[float, Principal]] = {}
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    async def _load(self, user_id: int) -> Principal | None:
+        rows = await User.filter(id=user_id).values("user_name", "status_type", "by_user_roles__id", "by_user_roles__role_code")
+        if not rows:
+            return None
+        role_rows = sorted((row["by_user_roles__id"], row["by_user_roles__role_code"]) for row in rows if row["by_user_roles__id"] is not None)
+        return Principal(
+            user_id=user_id,
+            user_name=rows[0]["user_name"],
+            status_type=StatusType(rows[0]["status_type"]),
+            role_ids=frozenset(role_id for role_id, _ in role_rows),
+            role_codes=tuple(role_code for _, role_code in role_rows),
+        )
+
+    async def get(self, user_id: int) -> Principal | None:
+        now = time.monotonic()
+        if (cached := self._cache.get(user_id)) and cached[0] > now:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        generation = self._generation
+        principal = await self._load(user_id)
+        if principal is not None and generation == self._generation:
+            if len(self._cache) >= self.max_size:
+                self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            self._cache[user_id] = (now + self.ttl, principal)
+        return principal
+
+    def invalidate(self, user_id: int | None = None) -> None:
+        """
+        :param user_id: 为None时清空全部, 用于角色变更
+        """
+        if user_id is None:
+            self._cache = {}
+        else:
+            self._cache.pop(user_id, None)
+        self._generation += 1
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache(ttl=APP_SETTINGS.PRINCIPAL_CACHE_TTL)
@@ -0,0 +1,49 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from app.settings import APP_SETTINGS
+
+PROVIDER_DOCTOR = "doctor"
+PROVIDER_LLM = "llm"
+
+
+class ProviderLimiter:
+    """
+    按外部服务限制本进程的并发调用数, 未配置的服务不限制
+    批量测试时执行引擎的工作协程数是全局上限, 这里再限制单个服务, 避免触发对方的限流
+    """
+
+    def __init__(self, limits: dict[str, int]):
+        self.limits = limits
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in limits.items() if limit > 0}
+
+        self.waiting: dict[str, int] = {name: 0 for name in self._semaphores}
+        self.calls: dict[str, int] = {name: 0 for name in self._semaphores}
+
+    @asynccontextmanager
+    async def limit(self, provider: str) -> AsyncIterator[None]:
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            yield
+            return
+
+        self.waiting[provider] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting[provider] -= 1
+        self.calls[provider] += 1
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {
+            name: {"limit": self.limits[name], "waiting": self.waiting[name], "calls": self.calls[name]}
+            for name in self._semaphores
+        }
+
+
+provider_limiter = ProviderLimiter(limits=APP_SETTINGS.PROVIDER_CONCURRENCY)
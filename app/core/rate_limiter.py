@@ -0,0 +1,151 @@
+import time
+from collections import OrderedDict
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.exceptions import HTTPException
+from app.log import log
+from app.settings import APP_SETTINGS
+
+Rate = tuple[int, float]  # (桶容量, 每秒补充的令牌数)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# 令牌桶, 使用Redis服务器时间, 多进程/多机共享同一个桶
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill = tonumber(ARGV[2])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * refill)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / refill
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / refill * 1000))
+return {allowed, tostring(retry_after)}
+"""
+
+
+def parse_rate(rate: str) -> Rate:
+    """
+    "5/minute" -> 每分钟5次, 允许一次性用完; 周期也可以是秒数, 例: "10/30"
+    """
+    count, _, period = rate.partition("/")
+    seconds = _PERIODS[period] if period in _PERIODS else float(period)
+    return int(count), int(count) / seconds
+
+
+class RateLimiter:
+    """
+    令牌桶限流, 按 路由模板 + 维度(ip/user_name) + 值 分桶
+    状态保存在Redis中, Redis不可用时退回到进程内存, retry_interval秒后再尝试Redis
+    """
+
+    def __init__(self, enabled: bool, redis_url: str, prefix: str, timeout: float, retry_interval: float, max_local_keys: int = 10000):
+        self.enabled = enabled
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.max_local_keys = max_local_keys
+
+        self._redis: aioredis.Redis | None = None
+        self._script = None
+        self._redis_down_until = 0.0
+        self._local: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+        self.allowed = 0
+        self.limited = 0
+        self.redis_errors = 0
+        self.local_hits = 0
+
+    def _get_script(self):
+        if self._script is None:
+            self._redis = aioredis.from_url(
+                url=self.redis_url,
+                socket_timeout=self.timeout,
+                socket_connect_timeout=self.timeout,
+            )
+            self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+        return self._script
+
+    async def _take_redis(self, key: str, rate: Rate) -> tuple[bool, float]:
+        capacity, refill = rate
+        allowed, retry_after = await self._get_script()(keys=[key], args=[capacity, refill])
+        return bool(allowed), float(retry_after)
+
+    def _take_local(self, key: str, rate: Rate) -> tuple[bool, float]:
+        capacity, refill = rate
+        now = time.monotonic()
+        tokens, ts = self._local.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - ts) * refill)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._local[key] = (tokens, now)
+        while len(self._local) > self.max_local_keys:
+            self._local.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill
+
+    async def _take(self, key: str, rate: Rate) -> tuple[bool, float]:
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                return await self._take_redis(key, rate)
+            except (RedisError, OSError) as e:
+                self.redis_errors += 1
+                self._redis_down_until = time.monotonic() + self.retry_interval
+                log.warning(f"RateLimiter Redis unavailable, fallback to local store for {self.retry_interval}s, exc: {e!r}")
+
+        self.local_hits += 1
+        return self._take_local(key, rate)
+
+    async def hit(self, route_template: str, dimension: str, value: str, rate: str) -> None:
+        """
+        消耗一个令牌, 桶为空时抛出HTTPException(4290)
+        """
+        if not self.enabled:
+            return
+
+        allowed, retry_after = await self._take(f"{self.prefix}:{route_template}:{dimension}:{value}", parse_rate(rate))
+        if allowed:
+            self.allowed += 1
+            return
+
+        self.limited += 1
+        raise HTTPException(code="4290", msg=f"Too many requests, please retry after {retry_after:.1f}s.")
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            self._script = None
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "backend": "redis" if time.monotonic() >= self._redis_down_until else "local",
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "redisErrors": self.redis_errors,
+            "localHits": self.local_hits,
+            "localKeys": len(self._local),
+        }
+
+
+rate_limiter = RateLimiter(
+    enabled=APP_SETTINGS.RATE_LIMIT_ENABLED,
+    redis_url=APP_SETTINGS.REDIS_URL,
+    prefix="rate-limit",
+    timeout=APP_SETTINGS.RATE_LIMIT_REDIS_TIMEOUT,
+    retry_interval=APP_SETTINGS.RATE_LIMIT_REDIS_RETRY_INTERVAL,
+)
@@ -0,0 +1,136 @@
+import functools
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi.responses import Response
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.core.ctx import CTX_PRINCIPAL
+from app.log import log
+from app.schemas.base import Success
+from app.settings import APP_SETTINGS
+
+# 读取全局版本号和用户版本号, 拼出缓存key后取值, 一次往返完成
+_GET_SCRIPT = """
+local versions = redis.call("HMGET", KEYS[1], "global", ARGV[1])
+local key = ARGV[2] .. ":g" .. (versions[1] or "0") .. ":u" .. (versions[2] or "0")
+return {key, redis.call("GET", key)}
+"""
+
+
+class RouteCache:
+    """
+    路由/用户信息接口的响应缓存, 保存在Redis中, 多进程共享
+    key由 接口名 + 用户id + 角色id + 全局版本号 + 用户版本号 组成
+    菜单/角色/按钮写入时递增全局版本号, 用户写入时递增该用户的版本号, 旧key等待TTL过期
+    Redis不可用时直接执行接口, 不影响请求
+    """
+
+    def __init__(self, redis_url: str, prefix: str, ttl: int, timeout: float):
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.ttl = ttl
+        self.timeout = timeout
+        self.versions_key = f"{prefix}:versions"
+
+        self._redis: aioredis.Redis | None = None
+        self._get_script = None
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _connect(self) -> aioredis.Redis:
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                url=self.redis_url,
+                socket_timeout=self.timeout,
+                socket_connect_timeout=self.timeout,
+            )
+            self._get_script = self._redis.register_script(_GET_SCRIPT)
+        return self._redis
+
+    async def _get(self, base_key: str, user_id: int) -> tuple[str, bytes | None]:
+        self._connect()
+        result = await self._get_script(keys=[self.versions_key], args=[f"user:{user_id}", base_key])
+        key = result[0].decode() if isinstance(result[0], bytes) else result[0]
+        return key, result[1] if len(result) > 1 else None
+
+    def cached(self, name: str, per_user: bool = True) -> Callable:
+        """
+        缓存接口返回的Success响应, 需放在@router.get之下, 保证FastAPI注册的是缓存后的函数
+        :param name: 接口名, 作为key的一部分
+        :param per_user: 是否按当前用户区分, 为True时接口需要依赖DependAuth
+        """
+
+        def decorator(func: Callable[..., Awaitable[Response]]) -> Callable[..., Awaitable[Response]]:
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Response:
+                user_id, role_ids = 0, ""
+                if per_user and (principal := CTX_PRINCIPAL.get()) is not None:
+                    user_id = principal.user_id
+                    role_ids = ",".join(map(str, sorted(principal.role_ids)))
+                base_key = f"{self.prefix}:{name}:{user_id}:{role_ids}"
+
+                key = None
+                try:
+                    key, body = await self._get(base_key, user_id)
+                    if body is not None:
+                        self.hits += 1
+                        return Response(content=body, media_type="application/json")
+                except (RedisError, OSError) as e:
+                    self.errors += 1
+                    log.warning(f"RouteCache get failed, key: {base_key}, exc: {e!r}")
+
+                self.misses += 1
+                response = await func(*args, **kwargs)
+                if key is not None and isinstance(response, Success):
+                    try:
+                        await self._connect().set(key, response.body, ex=self.ttl)
+                    except (RedisError, OSError) as e:
+                        self.errors += 1
+                        log.warning(f"RouteCache set failed, key: {key}, exc: {e!r}")
+                return response
+
+            return wrapper
+
+        return decorator
+
+    async def global_version(self) -> int | None:
+        """当前全局版本号, 供进程内缓存判断菜单等是否被其他进程修改, Redis不可用时返回None"""
+        try:
+            version = await self._connect().hget(self.versions_key, "global")
+        except (RedisError, OSError) as e:
+            self.errors += 1
+            log.warning(f"RouteCache get global version failed, exc: {e!r}")
+            return None
+        return int(version or 0)
+
+    async def invalidate(self, user_id: int | None = None) -> None:
+        """
+        :param user_id: 为None时递增全局版本号, 用于菜单/角色/按钮变更
+        """
+        field = "global" if user_id is None else f"user:{user_id}"
+        try:
+            await self._connect().hincrby(self.versions_key, field, 1)
+        except (RedisError, OSError) as e:
+            self.errors += 1
+            log.warning(f"RouteCache invalidate failed, field: {field}, exc: {e!r}")
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            self._get_script = None
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+route_cache = RouteCache(
+    redis_url=APP_SETTINGS.REDIS_URL,
+    prefix="route-cache",
+    ttl=APP_SETTINGS.ROUTE_CACHE_TTL,
+    timeout=APP_SETTINGS.ROUTE_CACHE_REDIS_TIMEOUT,
+)
@@ -0,0 +1,74 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.settings import APP_SETTINGS
+
+TokenResult = tuple[bool, int, Any]
+
+
+class TokenCache:
+    """
+    JWT校验结果的LRU缓存, 按token的sha256摘要索引
+    校验通过的结果在token的exp到期时失效, 无效token的结果缓存negative_ttl秒
+    """
+
+    def __init__(self, max_size: int, negative_ttl: float):
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self._cache: OrderedDict[bytes, tuple[float, TokenResult]] = OrderedDict()
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> TokenResult | None:
+        if (cached := self._cache.get(key)) is None:
+            self.misses += 1
+            return None
+
+        expires_at, result = cached
+        if time.time() >= expires_at:
+            del self._cache[key]
+            self.misses += 1
+            return None
+
+        self._cache.move_to_end(key)
+        if result[0]:
+            self.hits += 1
+        else:
+            self.negative_hits += 1
+        return result
+
+    def put(self, key: bytes, result: TokenResult) -> None:
+        status, _, decode_data = result
+        if status:
+            expires_at = decode_data.get("exp")
+            if expires_at is None:  # 没有exp的token不缓存
+                return
+        else:
+            expires_at = time.time() + self.negative_ttl
+
+        self._cache[key] = (expires_at, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._cache),
+            "hits": self.hits,
+            "negativeHits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+token_cache = TokenCache(max_size=APP_SETTINGS.JWT_CACHE_SIZE, negative_ttl=APP_SETTINGS.JWT_NEGATIVE_CACHE_TTL)
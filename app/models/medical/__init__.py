@@ -1,3 +1,4 @@
 from .disease import *
 from .test_execution import *
 from .api_token import *
+from .campaign import *
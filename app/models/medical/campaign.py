@@ -0,0 +1,42 @@
+"""
+FileName : campaign.py
+Desc :   批量测试任务模型定义
+"""
+
+from tortoise import fields
+
+from app.models.system.utils import BaseModel, TimestampMixin
+
+from .test_execution import ExecutionStatus
+
+
+class TestCampaign(BaseModel, TimestampMixin):
+    """批量测试任务, 按疾病筛选条件和重复次数生成多条测试执行, 执行结束时增量汇总"""
+    id = fields.IntField(pk=True, description="任务ID")
+    campaign_id = fields.CharField(max_length=100, unique=True, description="任务唯一标识")
+    name = fields.CharField(max_length=200, description="任务名称")
+    disease_filter = fields.JSONField(null=True, description="疾病筛选条件, 为空时覆盖全部疾病")
+    repeat = fields.IntField(default=1, description="每个疾病的重复次数")
+    max_rounds = fields.IntField(default=10, description="最大对话轮次")
+    status = fields.CharEnumField(enum_type=ExecutionStatus, default=ExecutionStatus.PENDING, description="任务状态")
+    start_time = fields.DatetimeField(null=True, description="开始时间")
+    end_time = fields.DatetimeField(null=True, description="结束时间")
+
+    total = fields.IntField(default=0, description="执行总数")
+    completed = fields.IntField(default=0, description="已结束的执行数")
+    succeeded = fields.IntField(default=0, description="成功的执行数")
+    errors = fields.IntField(default=0, description="失败的执行数")
+    matched = fields.IntField(default=0, description="诊断与预期疾病一致的执行数")
+    total_match_score = fields.FloatField(default=0, description="匹配分数累计")
+    total_latency = fields.FloatField(default=0, description="执行耗时累计(秒)")
+
+    class Meta:
+        table = "test_campaigns"
+        table_description = "批量测试任务表"
+        indexes = [
+            ("campaign_id",),
+            ("status",),
+        ]
+
+
+__all__ = ["TestCampaign"]
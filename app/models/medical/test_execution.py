@@ -34,7 +34,10 @@ class TestExecution(BaseModel, TimestampMixin):
     id = fields.IntField(pk=True, description="执行ID")
     execution_id = fields.CharField(max_length=100, unique=True, description="执行唯一标识")
     disease = fields.ForeignKeyField("app_system.Disease", related_name="test_executions", description="测试疾病")
+    campaign = fields.ForeignKeyField("app_system.TestCampaign", related_name="executions", null=True, description="所属批量测试任务")
     status = fields.CharEnumField(enum_type=ExecutionStatus, default=ExecutionStatus.PENDING, description="执行状态")
+    max_rounds = fields.IntField(default=10, description="最大对话轮次")
+    worker_id = fields.CharField(max_length=100, null=True, description="领取执行的工作节点")
     start_time = fields.DatetimeField(null=True, description="开始时间")
     end_time = fields.DatetimeField(null=True, description="结束时间")
     result = fields.JSONField(null=True, description="执行结果")
@@ -47,6 +50,7 @@ class TestExecution(BaseModel, TimestampMixin):
             ("execution_id",),
             ("disease_id",),
             ("status",),
+            ("campaign_id",),
         ]
 
 
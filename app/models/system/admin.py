@@ -146,6 +146,7 @@ class APILog(BaseModel):
     user_agent = fields.CharField(null=True, max_length=500, description="User-Agent")
     request_domain = fields.CharField(max_length=200, description="请求域名")
     request_path = fields.CharField(max_length=500, description="请求路径")
+    route_template = fields.CharField(null=True, max_length=500, description="路由模板")
     request_params = fields.JSONField(null=True, description="请求参数")
     request_data = fields.JSONField(null=True, description="请求体数据")
     response_data = fields.JSONField(null=True, description="响应数据")
@@ -161,6 +162,7 @@ class APILog(BaseModel):
             ("process_time",),
             ("x_request_id",),
             ("request_path",),
+            ("route_template",),
             ("response_code",),
         ]
 
@@ -1,56 +1,23 @@
-from datetime import datetime
-from decimal import Decimal
 from enum import Enum
-from uuid import UUID
 
 from tortoise import models, fields
 
-from app.settings import APP_SETTINGS
-from app.utils.tools import to_lower_camel_case
+from app.utils.serializer import get_serializer
 
 
 class BaseModel(models.Model):
     async def to_dict(
             self, include_fields: list[str] | None = None, exclude_fields: list[str] | None = None, m2m: bool = False
     ):
-        include_fields = include_fields or []
-        exclude_fields = exclude_fields or []
-
-        d = {}
-        for field in self._meta.db_fields:
-            if (not include_fields or field in include_fields) and (not exclude_fields or field not in exclude_fields):
-                value = getattr(self, field)
-                if isinstance(value, datetime):
-                    d[to_lower_camel_case("fmt_" + field)] = value.strftime(APP_SETTINGS.DATETIME_FORMAT)
-                    value = int(value.timestamp() * 1000)
-                elif isinstance(value, UUID):
-                    value = str(value)
-                elif isinstance(value, Decimal):
-                    value = float(value)
-                elif isinstance(value, Enum):
-                    value = value.value
-                d[to_lower_camel_case(field)] = value
-
-        if m2m:
-            for field in self._meta.m2m_fields:
-                if (not include_fields or field in include_fields) and (
-                        not exclude_fields or field not in exclude_fields
-                ):
-                    values = [value for value in await getattr(self, field).all().values()]
-                    for value in values:
-                        _value = value.copy()
-                        for k, v in _value.items():
-                            if isinstance(value, datetime):
-                                d[to_lower_camel_case("fmt_" + field)] = value.strftime(APP_SETTINGS.DATETIME_FORMAT)
-                                value = int(value.timestamp() * 1000)
-                            elif isinstance(v, UUID):
-                                v = str(v)
-                            elif isinstance(value, Decimal):
-                                value = float(value)
-                            value.pop(k)
-                            value[to_lower_camel_case(k)] = v
-                    d[to_lower_camel_case(field)] = values
-        return d
+        records = await get_serializer(type(self), include_fields, exclude_fields, m2m).serialize([self])
+        return records[0]
+
+    @classmethod
+    async def to_dicts(
+            cls, objs: list["BaseModel"], include_fields: list[str] | None = None, exclude_fields: list[str] | None = None, m2m: bool = False
+    ) -> list[dict]:
+        """批量序列化, 输出与逐个to_dict一致, 多对多关联按字段批量查询"""
+        return await get_serializer(cls, include_fields, exclude_fields, m2m).serialize(objs)
 
     class Meta:
         abstract = True
@@ -27,6 +27,7 @@ class AgentSearch(AgentBase):
     """Agent搜索Schema"""
     current: Annotated[int | None, Field(description="页码", ge=1)] = 1
     size: Annotated[int | None, Field(description="每页数量", ge=1, le=100)] = 10
+    cursor: Annotated[str | None, Field(description="游标, 传入上一页返回的nextCursor后按游标分页")] = None
 
 
 class AgentCreate(AgentBase):
@@ -19,6 +19,7 @@ class BaseApi(BaseModel):
 class ApiSearch(BaseApi):
     current: Annotated[int | None, Field(title="页码")] = 1
     size: Annotated[int | None, Field(title="每页数量")] = 10
+    cursor: Annotated[str | None, Field(title="游标", description="首页传空字符串开始游标分页(按id排序), 之后传入上一页返回的nextCursor")] = None
 
 
 class ApiCreate(BaseApi):
@@ -3,8 +3,17 @@ from typing import Any
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
+from app.utils.tools import orjson_dumpb
 
-class Custom(JSONResponse):
+
+class ORJSONResponse(JSONResponse):
+    """使用orjson编码, 共用orjson_dumpb的default处理"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson_dumpb(content)
+
+
+class Custom(ORJSONResponse):
     def __init__(
             self,
             code: str | int = "0000",
@@ -42,10 +51,11 @@ class SuccessExtra(Custom):
             total: int = 0,
             current: int | None = 1,
             size: int | None = 20,
+            next_cursor: str | None = None,
             **kwargs,
     ):
         if isinstance(data, dict):
-            data.update({"total": total, "current": current, "size": size})
+            data.update({"total": total, "current": current, "size": size, "nextCursor": next_cursor})
         super().__init__(code=code, msg=msg, data=data, status_code=200, **kwargs)
 
 
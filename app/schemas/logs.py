@@ -35,13 +35,16 @@ class BaseAPILog(BaseModel):
 class LogSearch(BaseLog):
     current: Annotated[int | None, Field(description="页码")] = None
     size: Annotated[int | None, Field(description="每页数量")] = None
+    cursor: Annotated[str | None, Field(description="游标, 传入上一页返回的nextCursor后按游标分页")] = None
     log_type: Annotated[LogType | None, Field(alias="logType", description="日志类型")] = None
     log_detail_type: Annotated[str | None, Field(alias="logDetailType", description="日志详细")] = None
     by_user: Annotated[str | None, Field(alias="byUser", description="关联用户")] = None
     request_path: Annotated[str | None, Field(alias="requestPath", description="请求路径")] = None
+    route_template: Annotated[str | None, Field(alias="routeTemplate", description="路由模板")] = None
     time_range: Annotated[list[datetime, datetime] | None, Field(alias="timeRange", description="时间范围")] = None
     response_code: Annotated[str | None, Field(alias="responseCode", description="业务状态码")] = None
     x_request_id: Annotated[str | None, Field(alias="xRequestId", description="x-request-id")] = None
+    with_response_data: Annotated[bool, Field(alias="withResponseData", description="API日志是否返回响应数据")] = False
 
 
 class LogCreate(BaseLog):
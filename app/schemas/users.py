@@ -24,6 +24,7 @@ class UserBase(BaseModel):
 class UserSearch(UserBase):
     current: Annotated[int | None, Field(description="页码")] = 1
     size: Annotated[int | None, Field(description="每页数量")] = 10
+    cursor: Annotated[str | None, Field(description="游标, 传入上一页返回的nextCursor后按游标分页")] = None
 
 
 class UserCreate(UserBase):
@@ -1,3 +1,4 @@
 from .data_import import *
 from .token_manager import *
 from .doctor_service import *
+from .campaign_service import *
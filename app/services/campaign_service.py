@@ -0,0 +1,177 @@
+"""
+FileName : campaign_service.py
+Desc :   批量测试任务服务
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+from loguru import logger
+from tortoise.expressions import F
+from tortoise.transactions import in_transaction
+
+from app.models.medical import Disease, ExecutionStatus, TestCampaign, TestExecution
+
+
+class CampaignService:
+    """批量测试任务服务"""
+
+    @staticmethod
+    def filter_diseases(disease_filter: dict[str, Any] | None):
+        """
+        按筛选条件查询疾病
+
+        Args:
+            disease_filter: diseaseIds / department / nameContains, 为空时返回全部疾病
+        """
+        query = Disease.all()
+        disease_filter = disease_filter or {}
+        if disease_filter.get("diseaseIds"):
+            query = query.filter(id__in=disease_filter["diseaseIds"])
+        if disease_filter.get("department"):
+            query = query.filter(department=disease_filter["department"])
+        if disease_filter.get("nameContains"):
+            query = query.filter(name__contains=disease_filter["nameContains"])
+        return query
+
+    @classmethod
+    async def create_campaign(
+        cls,
+        name: str,
+        disease_filter: dict[str, Any] | None = None,
+        repeat: int = 1,
+        max_rounds: int = 10
+    ) -> TestCampaign | None:
+        """
+        创建批量测试任务, 为每个疾病生成repeat条PENDING执行, 由执行引擎领取运行
+
+        Returns:
+            批量测试任务, 没有匹配的疾病时返回None
+        """
+        disease_ids = await cls.filter_diseases(disease_filter).order_by("id").values_list("id", flat=True)
+        if not disease_ids:
+            return None
+
+        async with in_transaction("conn_system") as conn:
+            campaign = await TestCampaign.create(
+                campaign_id=f"campaign_{uuid.uuid4().hex[:12]}",
+                name=name,
+                disease_filter=disease_filter,
+                repeat=repeat,
+                max_rounds=max_rounds,
+                status=ExecutionStatus.RUNNING,
+                start_time=datetime.now(),
+                total=len(disease_ids) * repeat,
+                using_db=conn
+            )
+            executions = [
+                TestExecution(
+                    execution_id=f"test_{uuid.uuid4().hex[:12]}",
+                    disease_id=disease_id,
+                    campaign_id=campaign.id,
+                    status=ExecutionStatus.PENDING,
+                    max_rounds=max_rounds
+                )
+                for _ in range(repeat)
+                for disease_id in disease_ids
+            ]
+            await TestExecution.bulk_create(executions, batch_size=500, using_db=conn)
+
+        logger.info(f"创建批量测试任务: {campaign.campaign_id}, 疾病 {len(disease_ids)} 个, 执行 {campaign.total} 次")
+        return campaign
+
+    @classmethod
+    async def finish_execution(cls, execution: TestExecution, status: ExecutionStatus, error_message: str | None = None) -> bool:
+        """
+        将RUNNING的执行条件更新为SUCCESS/ERROR, 只有完成状态转换的一方计入所属任务
+        超时清理与执行结束并发时, 同一条执行只计数一次
+
+        Args:
+            execution: 测试执行记录
+            status: 结束状态
+            error_message: 错误信息(可选)
+
+        Returns:
+            是否由本次调用完成状态转换
+        """
+        end_time = datetime.now()
+        values: dict[str, Any] = {"status": status, "end_time": end_time, "update_time": end_time}
+        if error_message is not None:
+            values["error_message"] = error_message
+        if execution.result is not None:
+            values["result"] = execution.result
+        updated = await TestExecution.filter(id=execution.id, status=ExecutionStatus.RUNNING).update(**values)
+        if updated != 1:
+            return False
+
+        execution.status = status
+        execution.end_time = end_time
+        if error_message is not None:
+            execution.error_message = error_message
+        try:
+            await cls.record_execution(execution)
+        except Exception as e:
+            logger.error(f"批量测试任务计数失败, 执行: {execution.execution_id}, 异常: {e!r}")
+        return True
+
+    @staticmethod
+    async def record_execution(execution: TestExecution) -> None:
+        """
+        执行结束后增量汇总到所属任务, 一次UPDATE累加计数, 不重新统计全部执行
+
+        Args:
+            execution: 已结束(SUCCESS/ERROR)的测试执行
+        """
+        if not execution.campaign_id:
+            return
+
+        result = execution.result if isinstance(execution.result, dict) else {}
+        try:
+            match_score = float(result.get("match_score") or 0)
+        except (TypeError, ValueError):
+            match_score = 0.0
+        latency = (execution.end_time - execution.start_time).total_seconds() if execution.start_time and execution.end_time else 0.0
+        succeeded = execution.status == ExecutionStatus.SUCCESS
+
+        await TestCampaign.filter(id=execution.campaign_id).update(
+            completed=F("completed") + 1,
+            succeeded=F("succeeded") + int(succeeded),
+            errors=F("errors") + int(not succeeded),
+            matched=F("matched") + int(result.get("is_match") is True),
+            total_match_score=F("total_match_score") + match_score,
+            total_latency=F("total_latency") + latency
+        )
+
+        campaign = await TestCampaign.get(id=execution.campaign_id)
+        if campaign.completed >= campaign.total:
+            await TestCampaign.filter(id=campaign.id, status=ExecutionStatus.RUNNING).update(
+                status=ExecutionStatus.SUCCESS,
+                end_time=datetime.now()
+            )
+            logger.info(f"批量测试任务完成: {campaign.campaign_id}")
+
+    @staticmethod
+    def summary(campaign: TestCampaign) -> dict[str, Any]:
+        """任务进度和汇总指标"""
+        return {
+            "campaign_id": campaign.campaign_id,
+            "name": campaign.name,
+            "status": campaign.status.value,
+            "disease_filter": campaign.disease_filter,
+            "repeat": campaign.repeat,
+            "max_rounds": campaign.max_rounds,
+            "start_time": campaign.start_time.strftime("%Y-%m-%d %H:%M:%S") if campaign.start_time else None,
+            "end_time": campaign.end_time.strftime("%Y-%m-%d %H:%M:%S") if campaign.end_time else None,
+            "total": campaign.total,
+            "completed": campaign.completed,
+            "succeeded": campaign.succeeded,
+            "errors": campaign.errors,
+            "progress": round(campaign.completed / campaign.total, 4) if campaign.total else 1,
+            "accuracy": round(campaign.matched / campaign.succeeded, 4) if campaign.succeeded else None,
+            "avg_match_score": round(campaign.total_match_score / campaign.succeeded, 4) if campaign.succeeded else None,
+            "avg_latency": round(campaign.total_latency / campaign.completed, 2) if campaign.completed else None,
+        }
+
+
+__all__ = ["CampaignService"]
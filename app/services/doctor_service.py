@@ -6,17 +6,17 @@ FileName : doctor_service.py
 Desc :   医生API调用服务
 """
 
+import asyncio
 from typing import AsyncIterator
 import httpx
 from loguru import logger
 
-from .token_manager import TokenManager
+from app.core.http_client import doctor_http_client
+from .token_manager import TokenManager, doctor_token_provider
 
 
 class DoctorService:
-    """医生API服务"""
-    
-    BASE_URL = "https://open.cn2030.com"
+    """医生API服务, 请求通过共享连接池发送"""
     
     @classmethod
     async def chat_stream(
@@ -54,30 +54,34 @@ class DoctorService:
         if patient_info:
             payload["patientInfo"] = patient_info
         
-        async with httpx.AsyncClient() as client:
-            try:
-                async with client.stream(
-                    "POST",
-                    f"{cls.BASE_URL}/api/doctor/chat",
-                    json=payload,
-                    headers=headers,
-                    timeout=60.0
-                ) as response:
-                    response.raise_for_status()
-                    
-                    # 处理SSE流式响应
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]  # 去掉 "data: " 前缀
-                            if data and data != "[DONE]":
-                                yield data
-                                
-            except httpx.HTTPError as e:
-                logger.error(f"医生API调用失败: {e}")
-                raise
-            except Exception as e:
-                logger.error(f"医生API处理异常: {e}")
-                raise
+        deadline = doctor_http_client.deadline()
+        loop = asyncio.get_running_loop()
+        try:
+            async with doctor_http_client.client.stream(
+                "POST",
+                "/api/doctor/chat",
+                json=payload,
+                headers=headers
+            ) as response:
+                response.raise_for_status()
+                
+                # 处理SSE流式响应
+                async for line in response.aiter_lines():
+                    if loop.time() > deadline:
+                        raise httpx.ReadTimeout("医生API响应超过总超时时间", request=response.request)
+                    if line.startswith("data: "):
+                        data = line[6:]  # 去掉 "data: " 前缀
+                        if data and data != "[DONE]":
+                            yield data
+                            
+        except httpx.HTTPError as e:
+            logger.error(f"医生API调用失败: {e}")
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 401:
+                await doctor_token_provider.invalidate(token)  # Token已失效, 下次调用重新登录
+            raise
+        except Exception as e:
+            logger.error(f"医生API处理异常: {e}")
+            raise
     
     @classmethod
     async def chat(
@@ -6,90 +6,202 @@ FileName : token_manager.py
 Desc :   医生API Token管理服务
 """
 
+import asyncio
+import time
 from datetime import datetime, timedelta
 import httpx
 from loguru import logger
+from tortoise import timezone
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
 
+from app.core.http_client import doctor_http_client
 from app.models.medical import DoctorApiToken
+from app.settings import APP_SETTINGS
 
 
 class TokenManager:
     """医生API Token管理器"""
-    
-    BASE_URL = "https://open.cn2030.com"
-    
+
     @classmethod
     async def get_valid_token(cls) -> str:
         """
-        获取有效的Token，如果不存在或已过期则自动刷新
-        
+        获取有效的Token，优先使用进程内缓存，快过期时自动刷新
+
         Returns:
             有效的访问令牌
         """
-        # 查找有效且未过期的Token
-        now = datetime.now()
-        token_record = await DoctorApiToken.filter(
-            is_active=True,
-            expires_at__gt=now
-        ).order_by('-create_time').first()
-        
-        if token_record:
-            logger.info("使用已有的有效Token")
-            return token_record.token
-        
-        # 需要获取新Token
-        logger.info("获取新的Token")
-        return await cls.fetch_new_token()
-    
+        return await doctor_token_provider.get_token()
+
+    @classmethod
+    async def load_or_fetch_token(cls, min_remaining: float) -> DoctorApiToken:
+        """
+        在Postgres咨询锁内读取有效Token，没有则登录获取
+        多个进程同时刷新时只有一个进程调用登录接口，其余进程等锁释放后读取新Token
+
+        Args:
+            min_remaining: 已有Token距过期至少还剩多少秒才复用，后台提前刷新时传入提前量，避免取回即将过期的同一个Token
+
+        Returns:
+            有效的Token记录
+        """
+        async with in_transaction(DoctorApiToken._meta.default_connection) as conn:
+            if conn.capabilities.dialect == "postgres":
+                await conn.execute_query("SELECT pg_advisory_xact_lock(hashtext('doctor_api_token'))")
+
+            # 等锁期间其他进程可能已刷新
+            usable_after = datetime.now() + timedelta(seconds=min_remaining)
+            token_record = await DoctorApiToken.filter(
+                is_active=True,
+                expires_at__gt=usable_after
+            ).order_by('-create_time').using_db(conn).first()
+
+            if token_record:
+                logger.info("使用已有的有效Token")
+                return token_record
+
+            logger.info("获取新的Token")
+            return await cls.fetch_new_token(using_db=conn)
+
     @classmethod
-    async def fetch_new_token(cls) -> str:
+    async def fetch_new_token(cls, using_db: BaseDBAsyncClient | None = None) -> DoctorApiToken:
         """
         从医生API获取新的Token
-        
+
+        Args:
+            using_db: 数据库连接（可选），在咨询锁的事务内刷新时传入
+
         Returns:
-            新获取的访问令牌
+            新获取的Token记录
         """
-        async with httpx.AsyncClient() as client:
-            try:
-                # 调用登录接口获取Token
-                response = await client.post(
-                    f"{cls.BASE_URL}/api/doctor/login",
-                    json={
-                        "username": "test_user",  # 需要配置实际的用户名
-                        "password": "test_password"  # 需要配置实际的密码
-                    },
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                token = data.get("data", {}).get("token")
-                
-                if not token:
-                    raise ValueError("Token获取失败，响应中没有token字段")
-                
-                # 保存Token到数据库（假设有效期为2小时）
-                expires_at = datetime.now() + timedelta(hours=2)
-                
-                # 将旧Token设置为无效
-                await DoctorApiToken.filter(is_active=True).update(is_active=False)
-                
-                # 保存新Token
-                await DoctorApiToken.create(
-                    token=token,
-                    expires_at=expires_at,
-                    is_active=True
-                )
-                
-                logger.info(f"成功获取新Token，过期时间: {expires_at}")
-                return token
-                
-            except httpx.HTTPError as e:
-                logger.error(f"获取Token失败: {e}")
-                raise
-            except Exception as e:
-                logger.error(f"Token处理异常: {e}")
-                raise
-
-
-__all__ = ["TokenManager"]
+        try:
+            # 调用登录接口获取Token
+            response = await doctor_http_client.with_total_timeout(doctor_http_client.client.post(
+                "/api/doctor/login",
+                json={
+                    "username": "test_user",  # 需要配置实际的用户名
+                    "password": "test_password"  # 需要配置实际的密码
+                }
+            ))
+            response.raise_for_status()
+
+            data = response.json()
+            token = data.get("data", {}).get("token")
+
+            if not token:
+                raise ValueError("Token获取失败，响应中没有token字段")
+
+            # 保存Token到数据库（假设有效期为2小时）
+            expires_at = datetime.now() + timedelta(hours=2)
+
+            # 将旧Token设置为无效
+            await DoctorApiToken.filter(is_active=True).using_db(using_db).update(is_active=False)
+
+            # 保存新Token
+            token_record = await DoctorApiToken.create(
+                token=token,
+                expires_at=expires_at,
+                is_active=True,
+                using_db=using_db
+            )
+
+            logger.info(f"成功获取新Token，过期时间: {expires_at}")
+            return token_record
+
+        except httpx.HTTPError as e:
+            logger.error(f"获取Token失败: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Token处理异常: {e}")
+            raise
+
+
+class DoctorTokenProvider:
+    """
+    医生API Token进程内缓存
+    距过期不足refresh_before秒时视为不可用, 所有调用方等待同一次刷新;
+    距过期不足refresh_ahead秒时在后台提前刷新, 调用方继续使用当前Token
+    """
+
+    def __init__(self, refresh_before: float, refresh_ahead: float, retry_interval: float):
+        self.refresh_before = refresh_before
+        self.refresh_ahead = refresh_ahead
+        self.retry_interval = retry_interval
+
+        self._token: str | None = None
+        self._expires_at = 0.0  # time.monotonic()时间
+        self._refresh_task: asyncio.Task | None = None
+        self._next_background_at = 0.0  # 下次允许后台刷新的时间, 每次刷新后间隔retry_interval
+
+        self.hits = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    @staticmethod
+    def _remaining_seconds(expires_at: datetime) -> float:
+        if timezone.is_aware(expires_at):
+            expires_at = timezone.make_naive(expires_at)
+        return (expires_at - datetime.now()).total_seconds()
+
+    async def _refresh(self, min_remaining: float) -> str:
+        try:
+            token_record = await TokenManager.load_or_fetch_token(min_remaining)
+        except Exception:
+            self.failures += 1
+            self._next_background_at = time.monotonic() + self.retry_interval
+            raise
+        self.refreshes += 1
+        self._next_background_at = time.monotonic() + self.retry_interval
+        self._token = token_record.token
+        self._expires_at = time.monotonic() + self._remaining_seconds(token_record.expires_at)
+        return self._token
+
+    def _start_refresh(self, min_remaining: float) -> asyncio.Task:
+        """同一时间只有一个刷新任务, 并发的调用方共用其结果"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh(min_remaining))
+            self._refresh_task.add_done_callback(lambda task: task.cancelled() or task.exception())  # 后台刷新的异常已计入failures
+        return self._refresh_task
+
+    async def get_token(self) -> str:
+        now = time.monotonic()
+        if self._token is not None and now < self._expires_at - self.refresh_before:
+            self.hits += 1
+            if now >= self._expires_at - self.refresh_ahead and now >= self._next_background_at:
+                self._start_refresh(self.refresh_ahead)  # 只复用比当前Token更新的记录, 否则重新登录
+            return self._token
+
+        return await asyncio.shield(self._start_refresh(self.refresh_before))  # 调用方被取消时不影响其他等待者
+
+    async def invalidate(self, token: str) -> None:
+        """医生API返回401时作废该Token, 下次刷新重新登录"""
+        await DoctorApiToken.filter(token=token, is_active=True).update(is_active=False)
+        if self._token == token:
+            self._token = None
+            self._expires_at = 0.0
+
+    async def close(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+        self._refresh_task = None
+
+    def stats(self) -> dict[str, int | float | bool]:
+        return {
+            "cached": self._token is not None,
+            "expiresIn": round(max(self._expires_at - time.monotonic(), 0), 1),
+            "refreshing": self._refresh_task is not None and not self._refresh_task.done(),
+            "hits": self.hits,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+doctor_token_provider = DoctorTokenProvider(
+    refresh_before=APP_SETTINGS.DOCTOR_TOKEN_REFRESH_BEFORE,
+    refresh_ahead=APP_SETTINGS.DOCTOR_TOKEN_REFRESH_AHEAD,
+    retry_interval=APP_SETTINGS.DOCTOR_TOKEN_RETRY_INTERVAL,
+)
+
+
+__all__ = ["TokenManager", "DoctorTokenProvider", "doctor_token_provider"]
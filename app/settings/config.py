@@ -40,6 +40,48 @@ class Settings(BaseSettings):
     ADD_LOG_ORIGINS_INCLUDE: list[str] = Field(default_factory=lambda: ["*"])
     ADD_LOG_ORIGINS_DECLUDE: list[str] = Field(default_factory=lambda: ["/system-manage", "/redoc", "/doc", "/openapi.json"])
 
+    # 日志异步批量写入
+    LOG_QUEUE_MAX_SIZE: int = 10000  # 队列上限, 超出后丢弃新日志并计数
+    LOG_BATCH_SIZE: int = 200  # 单批最多写入条数
+    LOG_FLUSH_INTERVAL: float = 1.0  # 最长刷新间隔(秒)
+
+    # API日志响应记录
+    API_LOG_RESPONSE_MAX_BYTES: int = 64 * 1024  # 响应体记录上限, 超出后只记录长度、摘要和开头片段
+    API_LOG_RESPONSE_DEFAULT_MODE: str = "body"  # body: 响应体, code: 只记录业务状态码, headers: 状态码与响应头
+    API_LOG_RESPONSE_RULES: dict[str, str] = Field(default_factory=dict)  # 路径前缀 -> 记录方式, 最长前缀优先
+
+    # API日志采样
+    API_LOG_SAMPLE_RATE: float = 1.0  # 默认采样率
+    API_LOG_SAMPLE_RULES: dict[str, float] = Field(default_factory=dict)  # 路由模板 -> 采样率, 例: {"/api/v1/route/user-routes": 0.1}
+    API_LOG_SLOW_THRESHOLD: float = 1.0  # 处理时间(秒)超过该值的请求始终记录
+    API_LOG_USER_BURST: int = 0  # 每个用户每分钟的前N个请求始终记录
+    API_LOG_SUCCESS_CODES: list[str] = Field(default_factory=lambda: ["0000"])  # 其余业务状态码视为错误, 始终记录
+
+    # 日志表按create_time分区(仅PostgreSQL)
+    LOG_PARTITION_ENABLED: bool = False
+    LOG_PARTITION_INTERVAL: str = "month"  # day / month
+    LOG_PARTITION_PREMAKE: int = 2  # 提前创建的未来分区数量
+    LOG_PARTITION_RETENTION: int = 0  # 保留的历史分区数量(不含当前分区), 0为不清理
+    LOG_PARTITION_RETENTION_ACTION: str = "drop"  # drop: 删除过期分区, detach: 只分离不删除
+    LOG_PARTITION_MAINTAIN_INTERVAL: int = 3600  # 分区维护间隔(秒)
+
+    # 列表接口total计数
+    LIST_COUNT_CACHE_TTL: int = 60  # cached计数的缓存时间(秒)
+    LIST_COUNT_ESTIMATE_MIN: int = 10000  # estimated计数的估算值低于该值时改为精确计数
+
+    # API权限缓存
+    PERMISSION_CACHE_TTL: int = 300  # 缓存时间(秒), 本进程内角色/API授权变更时立即失效, 其他进程最迟在该时间后生效
+
+    # 菜单祖先索引缓存
+    MENU_ANCESTRY_CACHE_TTL: int = 300  # 缓存时间(秒), 本进程内菜单变更时立即失效, 其他进程最迟在该时间后生效
+
+    # 路由/用户信息接口缓存(Redis), 菜单/角色/按钮/用户变更时立即失效
+    ROUTE_CACHE_TTL: int = 600  # 缓存时间(秒)
+    ROUTE_CACHE_REDIS_TIMEOUT: float = 0.2  # Redis超时时间(秒), 超时后不使用缓存
+
+    # 用户身份缓存
+    PRINCIPAL_CACHE_TTL: int = 30  # 缓存时间(秒), 本进程内用户/角色变更时立即失效
+
     DEBUG: bool = False
 
     PROJECT_ROOT: Path = Path(__file__).resolve().parent.parent
@@ -50,6 +92,45 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 12  # 12 hours
     JWT_REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    JWT_CACHE_SIZE: int = 10000  # token校验结果缓存条数
+    JWT_NEGATIVE_CACHE_TTL: int = 60  # 无效token校验结果的缓存时间(秒)
+
+    # 密码哈希(argon2), 参数变更后用户下次登录时自动按新参数重新哈希
+    PASSWORD_HASH_TIME_COST: int = 3
+    PASSWORD_HASH_MEMORY_COST: int = 65536  # KiB
+    PASSWORD_HASH_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 2  # 哈希线程数, 即同时执行的哈希/校验数量上限
+
+    # 限流(令牌桶), 格式: "次数/周期", 周期为 second/minute/hour/day 或秒数
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_IP: str = "20/minute"  # 登录接口, 按IP
+    RATE_LIMIT_LOGIN_USER: str = "5/minute"  # 登录接口, 按用户名
+    RATE_LIMIT_ERROR_IP: str = "1/second"  # 自定义错误接口, 按IP
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.2  # Redis超时时间(秒), 超时后退回进程内限流
+    RATE_LIMIT_REDIS_RETRY_INTERVAL: int = 30  # Redis不可用时, 间隔多少秒后重新尝试
+    # 信任哪些反向代理的X-Forwarded-For, 逗号分隔的IP/网段, 信任后request.client为真实客户端IP
+    # 默认只信任本机; docker compose部署时app只在内部网络可达, 设为"*"信任nginx
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
+    # 测试执行引擎, 各节点从test_executions表领取PENDING执行
+    EXECUTION_WORKERS: int = 2  # 本节点的并发执行数, 0为只入队不执行
+    EXECUTION_POLL_INTERVAL: float = 2.0  # 队列为空时的轮询间隔(秒)
+    EXECUTION_STALE_TIMEOUT: int = 3600  # RUNNING记录超过该时间(秒)没有心跳视为节点异常退出, 标记为ERROR
+    AGENT_REGISTRY_TTL: int = 300  # 子Agent实例复用时间(秒), 到期后重新查询配置, 本进程内配置变更时立即失效
+    PROVIDER_CONCURRENCY: dict[str, int] = Field(default_factory=lambda: {"doctor": 4, "llm": 8})  # 每个外部服务在本进程内的并发调用上限
+
+    # 医生API共享HTTP客户端
+    DOCTOR_API_BASE_URL: str = "https://open.cn2030.com"
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20  # 连接池上限
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 10  # 保持的空闲连接数
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0  # 空闲连接保持时间(秒)
+    HTTP_CLIENT_HTTP2: bool = False  # 启用HTTP/2, 需要安装h2
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 5.0  # 建立连接超时(秒)
+    HTTP_CLIENT_READ_TIMEOUT: float = 60.0  # 单次读取超时(秒), 流式响应为两段数据之间的间隔
+    HTTP_CLIENT_TOTAL_TIMEOUT: float = 180.0  # 整个请求的超时(秒)
+    DOCTOR_TOKEN_REFRESH_BEFORE: int = 60  # Token距过期不足该时间(秒)时不再使用, 等待刷新
+    DOCTOR_TOKEN_REFRESH_AHEAD: int = 600  # Token距过期不足该时间(秒)时在后台提前刷新
+    DOCTOR_TOKEN_RETRY_INTERVAL: int = 30  # 后台刷新失败后的重试间隔(秒)
 
     # PostgreSQL 数据库配置
     DB_HOST: str = "localhost"
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from collections.abc import Callable
+from typing import Any
+
+from app.models.system import Button, IconType, Menu
+from app.utils.serializer import get_serializer
+
+Node = dict[str, Any]
+
+
+def assemble_tree(
+        menus: list[Menu],
+        make_node: Callable[[Menu], Node],
+        make_leaf_children: Callable[[Menu], list[Node]] | None = None,
+        root_id: int = 0,
+) -> list[Node]:
+    """
+    按parent_id索引一次遍历生成树, 兄弟节点保持menus中的顺序
+    父菜单不在menus中的节点与递归写法一样被丢弃
+    :param make_node: 生成节点字典, 不含children
+    :param make_leaf_children: 为没有子菜单的节点生成children, 为None时不设置
+    """
+    nodes = {menu.id: make_node(menu) for menu in menus}
+    children: dict[int, list[Node]] = defaultdict(list)
+    for menu in menus:
+        children[menu.parent_id].append(nodes[menu.id])
+
+    for menu in menus:
+        if menu_children := children.get(menu.id):
+            nodes[menu.id]["children"] = menu_children
+        elif make_leaf_children is not None:
+            nodes[menu.id]["children"] = make_leaf_children(menu)
+    return children.get(root_id, [])
+
+
+async def load_active_menu_names(menus: list[Menu]) -> dict[int, str]:
+    """一次查询取出 激活菜单id -> 路由名称"""
+    active_menu_ids = {menu.active_menu_id for menu in menus if menu.active_menu_id}
+    if not active_menu_ids:
+        return {}
+    return dict(await Menu.filter(id__in=active_menu_ids).values_list("id", "route_name"))
+
+
+async def load_menu_buttons(menu_ids: list[int]) -> dict[int, list[Node]]:
+    """一次查询取出每个菜单的按钮, 按钮字典与Button.to_dict一致"""
+    serializer = get_serializer(Button)
+    grouped: dict[int, list[Node]] = defaultdict(list)
+    if not menu_ids:
+        return grouped
+
+    fields = [field for field, _, _ in serializer.plan]
+    rows = await Button.filter(by_button_menus__id__in=menu_ids).order_by("id").values(*fields, _menu_id="by_button_menus__id")
+    for row in rows:
+        grouped[row.pop("_menu_id")].append(serializer.serialize_row(row))
+    return grouped
+
+
+async def build_route_tree(menus: list[Menu]) -> list[Node]:
+    """前端路由树"""
+    active_menu_names = await load_active_menu_names(menus)
+
+    def make_node(menu: Menu) -> Node:
+        menu_dict = {
+            "name": menu.route_name,
+            "path": menu.route_path,
+            "component": menu.component,
+            "meta": {
+                "title": menu.menu_name,
+                "i18nKey": menu.i18n_key,
+                "order": menu.order,
+                "keepAlive": menu.keep_alive,
+                "icon": menu.icon,
+                "iconType": menu.icon_type,
+                "href": menu.href,
+                "activeMenu": active_menu_names.get(menu.active_menu_id),
+                "multiTab": menu.multi_tab,
+                "fixedIndexInTab": menu.fixed_index_in_tab,
+            }
+        }
+        if menu.icon_type == IconType.local:
+            menu_dict["meta"]["localIcon"] = menu.icon
+            menu_dict["meta"].pop("icon")
+        if menu.redirect:
+            menu_dict["redirect"] = menu.redirect
+        if menu.component:
+            menu_dict["meta"]["layout"] = menu.component.split("$", maxsplit=1)[0]
+        if menu.hide_in_menu and not menu.constant:
+            menu_dict["meta"]["hideInMenu"] = menu.hide_in_menu
+        return menu_dict
+
+    return assemble_tree(menus, make_node)
+
+
+async def build_menu_tree(menus: list[Menu], simple: bool = False) -> list[Node]:
+    """
+    菜单管理的菜单树
+    :param simple: 是否简化返回数据, 简化时不查询数据库
+    """
+    if simple:
+        return assemble_tree(menus, lambda menu: {"id": menu.id, "label": menu.menu_name, "pId": menu.parent_id})
+
+    records = dict(zip([menu.id for menu in menus], await Menu.to_dicts(menus)))
+    menu_buttons = await load_menu_buttons(list(records))
+
+    def make_node(menu: Menu) -> Node:
+        menu_dict = records[menu.id]
+        if menu.icon_type == IconType.local:
+            menu_dict["localIcon"] = menu.icon
+            menu_dict.pop("icon")
+        menu_dict["buttons"] = menu_buttons.get(menu.id, [])
+        return menu_dict
+
+    return assemble_tree(menus, make_node)
+
+
+async def build_menu_button_tree(menus: list[Menu]) -> list[Node]:
+    """菜单按钮树, 叶子菜单的children为其按钮"""
+    menu_buttons = await load_menu_buttons([menu.id for menu in menus])
+    return assemble_tree(
+        menus,
+        lambda menu: {"id": f"parent${menu.id}", "label": menu.menu_name, "pId": menu.parent_id},
+        lambda menu: [{"id": button["id"], "label": button["buttonCode"], "pId": menu.id} for button in menu_buttons.get(menu.id, [])],
+    )
+
+
+def with_ancestors(menus: list[Menu], all_menus: list[Menu]) -> list[Menu]:
+    """补全menus的所有上级菜单, 在内存中按parent_id查找, 结果按all_menus的顺序返回"""
+    by_id = {menu.id: menu for menu in all_menus}
+    selected: set[int] = set()
+    for menu in menus:
+        menu_id = menu.id
+        while menu_id in by_id and menu_id not in selected:
+            selected.add(menu_id)
+            menu_id = by_id[menu_id].parent_id
+    return [menu for menu in all_menus if menu.id in selected]
@@ -0,0 +1,102 @@
+from collections.abc import Iterable
+from functools import lru_cache
+
+from fastapi.routing import APIRoute
+
+
+class _Node:
+    __slots__ = ("static", "params", "catch_all", "template")
+
+    def __init__(self):
+        self.static: dict[str, _Node] = {}
+        self.params: dict[str, _Node] = {}  # 按转换器区分参数段, 例如"{id:int}"与"{name}"各自一支
+        self.catch_all: str | None = None  # {name:path}匹配剩余整段路径
+        self.template: str | None = None
+
+
+def _parse_param(segment: str) -> str | None:
+    """
+    "{role_id}" -> "str", "{role_id:int}" -> "int", 非参数段返回None
+    """
+    if len(segment) > 2 and segment[0] == "{" and segment[-1] == "}":
+        _, _, convertor = segment[1:-1].partition(":")
+        return convertor or "str"
+    return None
+
+
+def _accept(convertor: str, segment: str) -> bool:
+    if not segment:
+        return False
+    if convertor == "int":
+        return segment.isdigit()
+    return True
+
+
+class RouteMatcher:
+    """
+    路由模板前缀树, 按路径段逐级匹配, 把具体路径解析为 "/roles/{role_id}" 形式的模板
+    完整路径精确匹配, 静态段优先于参数段, 同级参数段按注册顺序尝试
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self.size = 0
+
+    @classmethod
+    def from_templates(cls, templates: Iterable[str]) -> "RouteMatcher":
+        matcher = cls()
+        for template in templates:
+            matcher.add(template)
+        return matcher
+
+    @classmethod
+    def from_routes(cls, routes: Iterable) -> "RouteMatcher":
+        return cls.from_templates(route.path_format for route in routes if isinstance(route, APIRoute))
+
+    def add(self, template: str) -> None:
+        node = self._root
+        for segment in template.split("/"):
+            convertor = _parse_param(segment)
+            if convertor == "path":
+                node.catch_all = template
+                self.size += 1
+                return
+            if convertor is None:
+                node = node.static.setdefault(segment, _Node())
+            else:
+                node = node.params.setdefault(convertor, _Node())
+
+        if node.template is None:
+            self.size += 1
+        node.template = template
+
+    def match(self, path: str) -> str | None:
+        segments = path.split("/")
+        return self._match(self._root, segments, 0)
+
+    def _match(self, node: _Node, segments: list[str], index: int) -> str | None:
+        if index == len(segments):
+            return node.template
+
+        segment = segments[index]
+        if (child := node.static.get(segment)) is not None:
+            if (template := self._match(child, segments, index + 1)) is not None:
+                return template
+        for convertor, child in node.params.items():  # 按注册顺序逐个尝试
+            if _accept(convertor, segment) and (template := self._match(child, segments, index + 1)) is not None:
+                return template
+        if node.catch_all is not None:
+            return node.catch_all
+        return None
+
+    def reload(self, routes: Iterable) -> None:
+        matcher = self.from_routes(routes)
+        self._root, self.size = matcher._root, matcher.size
+
+
+@lru_cache(maxsize=1024)
+def template_matcher(template: str) -> RouteMatcher:
+    return RouteMatcher.from_templates([template])
+
+
+route_matcher = RouteMatcher()
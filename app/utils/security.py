@@ -1,3 +1,9 @@
+import asyncio
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
 import jwt
 from passlib import pwd
 from passlib.context import CryptContext
@@ -5,8 +11,16 @@ from passlib.context import CryptContext
 from app.schemas.login import JWTPayload
 from app.settings import APP_SETTINGS
 
+T = TypeVar("T")
+
 # pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=APP_SETTINGS.PASSWORD_HASH_TIME_COST,
+    argon2__memory_cost=APP_SETTINGS.PASSWORD_HASH_MEMORY_COST,
+    argon2__parallelism=APP_SETTINGS.PASSWORD_HASH_PARALLELISM,
+)
 
 
 # ALGORITHM = "HS256"
@@ -28,3 +42,84 @@ def get_password_hash(password: str) -> str:
 
 def generate_password() -> str:
     return pwd.genword()
+
+
+class PasswordHasher:
+    """
+    argon2计算放到独立线程池中执行, 避免阻塞事件循环
+    同时执行的数量由信号量限制, 超出的请求排队等待
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rehashed = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.run_time = 0.0
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hasher")
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - start
+        self.wait_time += waited
+        self.max_wait_time = max(self.max_wait_time, waited)
+
+        self.running += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.run_time += time.perf_counter() - start
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        :return: (是否通过, 新哈希), argon2参数变更后旧哈希校验通过时返回按新参数生成的哈希, 否则为None
+        """
+        verified, new_hash = await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+        if new_hash is not None:
+            self.rehashed += 1
+        return verified, new_hash
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "workers": self.max_workers,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "rehashed": self.rehashed,
+            "avgWaitMs": round(self.wait_time / self.completed * 1000, 2) if self.completed else 0,
+            "maxWaitMs": round(self.max_wait_time * 1000, 2),
+            "avgRunMs": round(self.run_time / self.completed * 1000, 2) if self.completed else 0,
+        }
+
+
+password_hasher = PasswordHasher(max_workers=APP_SETTINGS.PASSWORD_HASH_WORKERS)
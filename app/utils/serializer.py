@@ -0,0 +1,134 @@
+from collections import defaultdict
+from collections.abc import Callable
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+from tortoise import fields
+from tortoise.models import Model
+
+from app.settings import APP_SETTINGS
+from app.utils.tools import to_lower_camel_case
+
+Converter = Callable[[dict[str, Any], Any], Any]
+
+
+def _convert_datetime(fmt_key: str) -> Converter:
+    datetime_format = APP_SETTINGS.DATETIME_FORMAT
+
+    def convert(d: dict[str, Any], value: Any) -> Any:
+        if isinstance(value, datetime):
+            d[fmt_key] = value.strftime(datetime_format)
+            return int(value.timestamp() * 1000)
+        return value
+
+    return convert
+
+
+def _get_converter(field: str, field_obj: fields.Field | None) -> Converter | None:
+    """
+    只有datetime需要转换(格式化字符串 + 毫秒时间戳), UUID/Decimal/Enum由响应的orjson编码处理
+    """
+    if isinstance(field_obj, fields.DatetimeField):
+        return _convert_datetime(to_lower_camel_case("fmt_" + field))
+    return None
+
+
+class ModelSerializer:
+    """
+    按模型预编译的序列化器, 输出与BaseModel.to_dict一致
+    字段顺序、小驼峰键名和类型转换在构建时确定, 多对多关联按页批量查询
+    """
+
+    def __init__(
+            self,
+            model: type[Model],
+            include_fields: tuple[str, ...] = (),
+            exclude_fields: tuple[str, ...] = (),
+            m2m: bool = False,
+    ):
+        self.model = model
+
+        def selected(field: str) -> bool:
+            return (not include_fields or field in include_fields) and (not exclude_fields or field not in exclude_fields)
+
+        # 与to_dict相同, 按_meta.db_fields的迭代顺序输出
+        self.plan: list[tuple[str, str, Converter | None]] = [
+            (field, to_lower_camel_case(field), _get_converter(field, model._meta.fields_map.get(field)))
+            for field in model._meta.db_fields
+            if selected(field)
+        ]
+
+        self.m2m_plan: list[tuple[str, str, type[Model], str, dict[str, str]]] = []
+        if m2m:
+            for field in model._meta.m2m_fields:
+                if not selected(field):
+                    continue
+                field_obj: fields.ManyToManyFieldInstance = model._meta.fields_map[field]  # type: ignore
+                related_model = field_obj.related_model
+                related_fields = [
+                    name for name in related_model._meta.fields_map.keys() if name in related_model._meta.fields_db_projection
+                ]
+                self.m2m_plan.append((
+                    to_lower_camel_case(field),
+                    f"{field_obj.related_name}__{model._meta.pk_attr}",
+                    related_model,
+                    model._meta.pk_attr,
+                    {name: to_lower_camel_case(name) for name in related_fields},
+                ))
+
+    def serialize_obj(self, obj: Model) -> dict[str, Any]:
+        """只序列化表字段, 不查询关联"""
+        d: dict[str, Any] = {}
+        for field, key, convert in self.plan:
+            value = getattr(obj, field)
+            d[key] = convert(d, value) if convert else value
+        return d
+
+    def serialize_row(self, row: dict[str, Any], prefix: str = "") -> dict[str, Any]:
+        """
+        序列化values()查询得到的一行
+        :param prefix: 联表投影时关联字段的前缀, 例如"api_log__", 行中不存在的字段跳过
+        """
+        d: dict[str, Any] = {}
+        for field, key, convert in self.plan:
+            if (name := prefix + field) not in row:
+                continue
+            value = row[name]
+            d[key] = convert(d, value) if convert else value
+        return d
+
+    def serialize_rows(self, rows: list[dict[str, Any]], prefix: str = "") -> list[dict[str, Any]]:
+        return [self.serialize_row(row, prefix) for row in rows]
+
+    async def serialize(self, objs: list[Model]) -> list[dict[str, Any]]:
+        """批量序列化, 每个多对多字段只查询一次"""
+        records = [self.serialize_obj(obj) for obj in objs]
+        if not self.m2m_plan or not objs:
+            return records
+
+        ids = [getattr(obj, self.model._meta.pk_attr) for obj in objs]
+        for key, owner_path, related_model, pk_attr, related_keys in self.m2m_plan:
+            grouped: dict[Any, list[dict[str, Any]]] = defaultdict(list)
+            rows = await related_model.filter(**{f"{owner_path}__in": ids}).values(*related_keys, _owner_id=owner_path)
+            for row in rows:
+                owner_id = row.pop("_owner_id")
+                grouped[owner_id].append({related_keys[name]: value for name, value in row.items()})
+            for obj, record in zip(objs, records):
+                record[key] = grouped.get(getattr(obj, pk_attr), [])
+        return records
+
+
+@lru_cache(maxsize=256)
+def _get_serializer(model: type[Model], include_fields: tuple[str, ...], exclude_fields: tuple[str, ...], m2m: bool) -> ModelSerializer:
+    return ModelSerializer(model, include_fields, exclude_fields, m2m)
+
+
+def get_serializer(
+        model: type[Model],
+        include_fields: list[str] | None = None,
+        exclude_fields: list[str] | None = None,
+        m2m: bool = False,
+) -> ModelSerializer:
+    """按(模型, 字段选择)缓存序列化器"""
+    return _get_serializer(model, tuple(include_fields or ()), tuple(exclude_fields or ()), m2m)
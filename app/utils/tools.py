@@ -1,19 +1,20 @@
 import datetime
 import re
+from decimal import Decimal
 
 # from bson import ObjectId
 import orjson
 
+from app.utils.route_matcher import template_matcher
+
 LAYOUT_PREFIX = 'layout.'
 VIEW_PREFIX = 'view.'
 FIRST_LEVEL_ROUTE_COMPONENT_SPLIT = '$'
 
 
 def check_url(url: str = "/api/v1/system-manage/roles/{role_id}/buttons", url2: str = "/api/v1/system-manage/roles/1/buttons") -> bool:
-    pattern = re.sub(r'\{.*?}', '[^/]+', url)
-    if re.match(pattern, url2):
-        return True
-    return False
+    """路由模板与具体路径是否完整匹配"""
+    return template_matcher(url).match(url2) is not None
 
 
 def get_layout_and_page(component=None):
@@ -127,18 +128,21 @@ def to_lower_camel_case(x):
     return s[0].lower() + s[1:]
 
 
-# 这里可以处理一些原本处理不了的格式（ObjectId）或者自定义显示格式（datetime）
+ORJSON_OPTION = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+# orjson原生支持datetime/date/UUID/Enum/dataclass, 这里处理其余类型
 def _default(obj):
-    if isinstance(obj, datetime.datetime):
-        if obj != obj:
-            return None
-        if obj.hour == 0 and obj.minute == 0:
-            return obj.strftime("%Y-%m-%d")
-        return obj.strftime("%Y-%m-%d %H:%M:%S")
-    elif isinstance(obj, datetime.date):
-        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    elif isinstance(obj, (set, frozenset)):
+        return list(obj)
+    elif isinstance(obj, BaseException):  # 例如RequestValidationError.errors()中的ctx
+        return str(obj)
     # elif isinstance(obj, ObjectId):
     #     return obj.__str__()
+    elif hasattr(obj, "model_dump"):  # pydantic
+        return obj.model_dump(mode="json")
     elif hasattr(obj, "asdict"):
         return obj.asdict()
     elif hasattr(obj, "_asdict"):  # namedtuple
@@ -149,12 +153,14 @@ def _default(obj):
         raise TypeError(f"Unsupported json dump type: {type(obj)}")
 
 
-def orjson_dumps(data):
-    # 这里的样式通过 | 的方式叠加， 其实每个对应的是一个数字， 更多的样式可以见上面的 github 链接
-    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_INDENT_2
-    rv = orjson.dumps(data, default=_default, option=option)
-    # rv = orjson.dumps(data, default=_default)
-    return rv.decode(encoding='utf-8')
+def orjson_dumpb(data, indent: bool = False) -> bytes:
+    # 这里的样式通过 | 的方式叠加， 其实每个对应的是一个数字， 更多的样式可以见 orjson 文档
+    option = ORJSON_OPTION | orjson.OPT_INDENT_2 if indent else ORJSON_OPTION
+    return orjson.dumps(data, default=_default, option=option)
+
+
+def orjson_dumps(data, indent: bool = False) -> str:
+    return orjson_dumpb(data, indent).decode(encoding='utf-8')
 
 
 def timestamp_to_time(timestamp):
@@ -0,0 +1,14 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "api_logs" ADD COLUMN IF NOT EXISTS "route_template" VARCHAR(500);
+        COMMENT ON COLUMN "api_logs"."route_template" IS '路由模板';
+        CREATE INDEX IF NOT EXISTS "idx_api_logs_route_t_b76cfd" ON "api_logs" ("route_template");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_api_logs_route_t_b76cfd";
+        ALTER TABLE "api_logs" DROP COLUMN IF EXISTS "route_template";"""
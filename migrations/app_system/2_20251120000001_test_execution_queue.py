@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "test_executions" ADD COLUMN IF NOT EXISTS "max_rounds" INT NOT NULL DEFAULT 10;
+        ALTER TABLE "test_executions" ADD COLUMN IF NOT EXISTS "worker_id" VARCHAR(100);
+        COMMENT ON COLUMN "test_executions"."max_rounds" IS '最大对话轮次';
+        COMMENT ON COLUMN "test_executions"."worker_id" IS '领取执行的工作节点';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "test_executions" DROP COLUMN IF EXISTS "worker_id";
+        ALTER TABLE "test_executions" DROP COLUMN IF EXISTS "max_rounds";"""
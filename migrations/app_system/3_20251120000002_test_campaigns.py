@@ -0,0 +1,38 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "test_campaigns" (
+    "create_time" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "update_time" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "id" SERIAL NOT NULL PRIMARY KEY,
+    "campaign_id" VARCHAR(100) NOT NULL UNIQUE,
+    "name" VARCHAR(200) NOT NULL,
+    "disease_filter" JSONB,
+    "repeat" INT NOT NULL DEFAULT 1,
+    "max_rounds" INT NOT NULL DEFAULT 10,
+    "status" VARCHAR(7) NOT NULL DEFAULT 'pending',
+    "start_time" TIMESTAMP,
+    "end_time" TIMESTAMP,
+    "total" INT NOT NULL DEFAULT 0,
+    "completed" INT NOT NULL DEFAULT 0,
+    "succeeded" INT NOT NULL DEFAULT 0,
+    "errors" INT NOT NULL DEFAULT 0,
+    "matched" INT NOT NULL DEFAULT 0,
+    "total_match_score" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "total_latency" DOUBLE PRECISION NOT NULL DEFAULT 0
+);
+        CREATE INDEX IF NOT EXISTS "idx_test_campai_campaig_5c6a55" ON "test_campaigns" ("campaign_id");
+        CREATE INDEX IF NOT EXISTS "idx_test_campai_status_64123f" ON "test_campaigns" ("status");
+        COMMENT ON TABLE "test_campaigns" IS '批量测试任务表';
+        ALTER TABLE "test_executions" ADD COLUMN IF NOT EXISTS "campaign_id" INT REFERENCES "test_campaigns" ("id") ON DELETE CASCADE;
+        COMMENT ON COLUMN "test_executions"."campaign_id" IS '所属批量测试任务';
+        CREATE INDEX IF NOT EXISTS "idx_test_execut_campaig_ba6f0b" ON "test_executions" ("campaign_id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_test_execut_campaig_ba6f0b";
+        ALTER TABLE "test_executions" DROP COLUMN IF EXISTS "campaign_id";
+        DROP TABLE IF EXISTS "test_campaigns";"""
@@ -1,7 +1,16 @@
 import uvicorn
 
+from app.settings import APP_SETTINGS
+
 if __name__ == "__main__":
     try:
-        uvicorn.run("app:app", host="0.0.0.0", port=9999, reload=False)  # , log_config=LOGGING_CONFIG
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=9999,
+            reload=False,
+            proxy_headers=True,
+            forwarded_allow_ips=APP_SETTINGS.FORWARDED_ALLOW_IPS,
+        )  # , log_config=LOGGING_CONFIG
     except KeyboardInterrupt:
         ...
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+FileName : bench_api_logger.py
+Desc :   API日志中间件吞吐对比(BaseHTTPMiddleware旧实现 vs 纯ASGI实现)
+
+用法: python scripts/bench_api_logger.py --requests 5000 --concurrency 50
+只测量中间件自身开销, 日志入队后不落库
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+from json import JSONDecodeError
+from pathlib import Path
+from uuid import uuid4
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.ctx import CTX_X_REQUEST_ID
+from app.core.log_writer import log_writer
+from app.core.middlewares import APILoggerAddResponseMiddleware, APILoggerMiddleware
+from app.settings import APP_SETTINGS
+
+
+class LegacyAPILoggerMiddleware(BaseHTTPMiddleware):
+    """旧实现: 每个请求预读请求体, 逐条扫描包含/排除列表"""
+
+    async def dispatch(self, request: Request, call_next):
+        request.state.start_time = datetime.now()
+        path = request.url.path
+        x_request_id = uuid4().hex
+        CTX_X_REQUEST_ID.set(x_request_id)
+        request.state.x_request_id = x_request_id
+        if (
+                all([declude not in path for declude in APP_SETTINGS.ADD_LOG_ORIGINS_DECLUDE])
+                and (
+                "*" in APP_SETTINGS.ADD_LOG_ORIGINS_INCLUDE
+                or any([include in path for include in APP_SETTINGS.ADD_LOG_ORIGINS_INCLUDE]))
+        ):
+            try:
+                request_data = await request.json() if request.method in ["POST", "PUT", "PATCH"] else None
+            except (JSONDecodeError, UnicodeDecodeError):
+                request_data = None
+
+            request.state.api_log_data = dict(
+                ip_address=request.client.host if request.client else None,
+                user_agent=request.headers.get("user-agent"),
+                request_domain=request.url.hostname,
+                request_path=path,
+                request_params=dict(request.query_params) or None,
+                request_data=request_data,
+                x_request_id=x_request_id,
+                create_time=request.state.start_time,
+            )
+            request.state.log_data = dict(x_request_id=x_request_id, create_time=request.state.start_time)
+
+        return await call_next(request)
+
+
+async def echo(request: Request):
+    body = await request.json()
+    return JSONResponse({"code": "0000", "msg": "OK", "data": body})
+
+
+def build_app(logger_middleware) -> Starlette:
+    return Starlette(
+        routes=[Route("/api/v1/echo", echo, methods=["POST"])],
+        middleware=[Middleware(logger_middleware), Middleware(APILoggerAddResponseMiddleware)],
+    )
+
+
+async def run(app: Starlette, total: int, concurrency: int) -> float:
+    payload = {"userName": "bench", "items": list(range(50))}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                response = await client.post("/api/v1/echo", json=payload)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    log_writer._queue.clear()
+    return total / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="API日志中间件吞吐对比")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    log_writer.max_size = args.requests * 2
+    for name, middleware in (("before (BaseHTTPMiddleware)", LegacyAPILoggerMiddleware), ("after (pure ASGI)", APILoggerMiddleware)):
+        await run(build_app(middleware), min(args.requests, 500), args.concurrency)  # 预热
+        rps = await run(build_app(middleware), args.requests, args.concurrency)
+        print(f"{name:<30} {rps:>10.1f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""
+FileName : bench_doctor_client.py
+Desc :   医生API每轮对话耗时对比(每次新建AsyncClient vs 共享连接池)
+
+用法:
+    python scripts/bench_doctor_client.py --rounds 200
+    python scripts/bench_doctor_client.py --url https://127.0.0.1:8443 --insecure
+不指定--url时在本进程启动一个本地替身服务(明文HTTP, 只包含TCP握手); 指定HTTPS替身服务可同时测量TLS握手
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+
+from app.core.http_client import HttpClientPool
+from app.settings import APP_SETTINGS
+
+PAYLOAD = {"sessionId": "bench", "query": "医生您好, 我最近总是头疼", "stream": True}
+
+
+async def fake_chat(request: Request):
+    await request.body()
+
+    async def events():
+        for chunk in ("请问", "头疼持续", "多久了?"):
+            yield f"data: {chunk}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+async def chat_round(client: httpx.AsyncClient, url: str) -> str:
+    reply = ""
+    async with client.stream("POST", url, json=PAYLOAD) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("data: ") and line[6:] != "[DONE]":
+                reply += line[6:]
+    return reply
+
+
+async def bench(name: str, rounds: int, run_round) -> None:
+    costs = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await run_round()
+        costs.append((time.perf_counter() - start) * 1000)
+    costs.sort()
+    print(
+        f"{name:<12} rounds={rounds} avg={statistics.mean(costs):.2f}ms "
+        f"p50={costs[len(costs) // 2]:.2f}ms p99={costs[int(len(costs) * 0.99) - 1]:.2f}ms"
+    )
+
+
+async def main(args: argparse.Namespace):
+    server = None
+    base_url = args.url
+    if base_url is None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        app = Starlette(routes=[Route("/api/doctor/chat", fake_chat, methods=["POST"])])
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        serve_task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        base_url = f"http://127.0.0.1:{port}"
+
+    verify = not args.insecure
+
+    async def legacy_round():
+        async with httpx.AsyncClient(verify=verify) as client:
+            await chat_round(client, f"{base_url}/api/doctor/chat")
+
+    pool = HttpClientPool(
+        base_url=base_url,
+        max_connections=APP_SETTINGS.HTTP_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=APP_SETTINGS.HTTP_CLIENT_MAX_KEEPALIVE,
+        keepalive_expiry=APP_SETTINGS.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+        http2=args.http2,
+        connect_timeout=APP_SETTINGS.HTTP_CLIENT_CONNECT_TIMEOUT,
+        read_timeout=APP_SETTINGS.HTTP_CLIENT_READ_TIMEOUT,
+        total_timeout=APP_SETTINGS.HTTP_CLIENT_TOTAL_TIMEOUT,
+    )
+    if args.insecure:
+        pool.use(httpx.AsyncClient(base_url=base_url, limits=pool.limits, timeout=pool.timeout, http2=pool.http2, verify=False))
+
+    async def pooled_round():
+        await chat_round(pool.client, "/api/doctor/chat")
+
+    try:
+        await bench("new client", args.rounds, legacy_round)
+        await bench("shared pool", args.rounds, pooled_round)
+        print(pool.stats())
+    finally:
+        await pool.close()
+        if server is not None:
+            server.should_exit = True
+            await serve_task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="医生API客户端耗时对比")
+    parser.add_argument("--rounds", type=int, default=200, help="对话轮次")
+    parser.add_argument("--url", help="替身服务地址, 不指定时启动本地服务")
+    parser.add_argument("--insecure", action="store_true", help="不校验证书(自签名的HTTPS替身服务)")
+    parser.add_argument("--http2", action="store_true", help="共享连接池使用HTTP/2")
+    asyncio.run(main(parser.parse_args()))
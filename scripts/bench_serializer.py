@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+FileName : bench_serializer.py
+Desc :   模型序列化对比(逐行BaseModel.to_dict旧实现 vs 预编译序列化器)
+
+用法: python scripts/bench_serializer.py --rows 1000 --rounds 20
+使用内存SQLite, 同时校验两种实现编码后的响应逐字节一致
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from uuid import UUID
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tortoise import Tortoise
+
+from app.models.system import Menu, Role, User
+from app.settings import APP_SETTINGS
+from app.utils.tools import orjson_dumpb, to_lower_camel_case
+
+
+async def legacy_to_dict(self, include_fields: list[str] | None = None, exclude_fields: list[str] | None = None, m2m: bool = False):
+    """旧实现: 每次调用遍历字段并做isinstance判断和正则驼峰转换, 多对多每个对象单独查询"""
+    include_fields = include_fields or []
+    exclude_fields = exclude_fields or []
+
+    d = {}
+    for field in self._meta.db_fields:
+        if (not include_fields or field in include_fields) and (not exclude_fields or field not in exclude_fields):
+            value = getattr(self, field)
+            if isinstance(value, datetime):
+                d[to_lower_camel_case("fmt_" + field)] = value.strftime(APP_SETTINGS.DATETIME_FORMAT)
+                value = int(value.timestamp() * 1000)
+            elif isinstance(value, UUID):
+                value = str(value)
+            elif isinstance(value, Decimal):
+                value = float(value)
+            elif isinstance(value, Enum):
+                value = value.value
+            d[to_lower_camel_case(field)] = value
+
+    if m2m:
+        for field in self._meta.m2m_fields:
+            if (not include_fields or field in include_fields) and (not exclude_fields or field not in exclude_fields):
+                values = [value for value in await getattr(self, field).all().values()]
+                for value in values:
+                    _value = value.copy()
+                    for k, v in _value.items():
+                        if isinstance(v, UUID):
+                            v = str(v)
+                        value.pop(k)
+                        value[to_lower_camel_case(k)] = v
+                d[to_lower_camel_case(field)] = values
+    return d
+
+
+async def prepare(rows: int) -> list[User]:
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"app_system": ["app.models.system", "app.models.medical"]})
+    await Tortoise.generate_schemas()
+    home = await Menu.create(menu_name="home", route_name="home", route_path="/home", menu_type="1")
+    roles = [await Role.create(role_name=f"role{i}", role_code=f"R_{i}", by_role_home=home) for i in range(3)]
+    await User.bulk_create([User(user_name=f"user{i}", password="x", nick_name=f"nick{i}", user_email=f"{i}@bench") for i in range(rows)])
+    users = await User.all().order_by("id")
+    for user in users:
+        await user.by_user_roles.add(*roles[:user.id % 3 + 1])
+    return users
+
+
+def dumps(data) -> bytes:
+    """旧响应的编码方式: Starlette JSONResponse"""
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+async def measure(name: str, func, rounds: int) -> None:
+    await func()  # 预热
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await func()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{name:<40} {elapsed * 1000:>10.2f} ms/page")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="模型序列化对比")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    users = await prepare(args.rows)
+    for m2m in (False, True):
+        before = [await legacy_to_dict(user, exclude_fields=["password"], m2m=m2m) for user in users]
+        after = await User.to_dicts(users, exclude_fields=["password"], m2m=m2m)
+        # 旧实现多对多结果中的datetime无法被JSONResponse编码, 这部分只比较orjson编码结果
+        expected = orjson_dumpb(before) if m2m else dumps(before)
+        assert expected == orjson_dumpb(after), "输出不一致"
+
+        label = "m2m" if m2m else "fields"
+
+        async def legacy():
+            return [await legacy_to_dict(user, exclude_fields=["password"], m2m=m2m) for user in users]
+
+        async def compiled():
+            return await User.to_dicts(users, exclude_fields=["password"], m2m=m2m)
+
+        await measure(f"before (to_dict per row, {label})", legacy, args.rounds)
+        await measure(f"after (compiled serializer, {label})", compiled, args.rounds)
+
+    await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""
+FileName : run_campaign.py
+Desc :   创建并运行批量测试任务
+
+用法:
+    python scripts/run_campaign.py --name 全量回归 --all --repeat 3
+    python scripts/run_campaign.py --name 心内科 --department 心内科 --workers 8
+--workers 为0时只入队, 由运行中的服务节点领取执行; 否则在本进程启动执行引擎, 直到任务结束
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目路径
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tortoise import Tortoise
+from loguru import logger
+
+from app.core.execution_engine import ExecutionEngine
+from app.core.http_client import doctor_http_client
+from app.models.medical import ExecutionStatus, TestCampaign, TestExecution
+from app.services import CampaignService, doctor_token_provider
+from app.settings import APP_SETTINGS
+
+
+async def run_campaign(args: argparse.Namespace):
+    await Tortoise.init(config=APP_SETTINGS.TORTOISE_ORM)
+
+    disease_filter = None
+    if not args.all:
+        disease_filter = {
+            "diseaseIds": [int(i) for i in args.disease_ids.split(",")] if args.disease_ids else None,
+            "department": args.department,
+            "nameContains": args.name_contains,
+        }
+        disease_filter = {k: v for k, v in disease_filter.items() if v} or None
+        if disease_filter is None:
+            logger.error("请指定疾病筛选条件, 或使用 --all 覆盖全部疾病")
+            await Tortoise.close_connections()
+            return
+
+    campaign = await CampaignService.create_campaign(
+        name=args.name,
+        disease_filter=disease_filter,
+        repeat=args.repeat,
+        max_rounds=args.max_rounds
+    )
+    if campaign is None:
+        logger.error("没有符合条件的疾病")
+        await Tortoise.close_connections()
+        return
+
+    if args.workers > 0:
+        engine = ExecutionEngine(
+            workers=args.workers,
+            poll_interval=1,
+            stale_timeout=APP_SETTINGS.EXECUTION_STALE_TIMEOUT,
+            campaign_id=campaign.id
+        )
+        await engine.start()
+        try:
+            # 计数失败时completed可能达不到total, 以本任务没有待执行/执行中的记录为结束条件
+            while campaign.status == ExecutionStatus.RUNNING and await TestExecution.filter(
+                campaign_id=campaign.id,
+                status__in=[ExecutionStatus.PENDING, ExecutionStatus.RUNNING]
+            ).exists():
+                await asyncio.sleep(args.report_interval)
+                campaign = await TestCampaign.get(id=campaign.id)
+                summary = CampaignService.summary(campaign)
+                logger.info(
+                    f"进度 {summary['completed']}/{summary['total']}, 失败 {summary['errors']}, "
+                    f"准确率 {summary['accuracy']}, 平均耗时 {summary['avg_latency']}s"
+                )
+            campaign = await TestCampaign.get(id=campaign.id)
+        finally:
+            await engine.stop()
+            await doctor_token_provider.close()
+            await doctor_http_client.close()
+
+    logger.info(CampaignService.summary(campaign))
+    await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量测试任务")
+    parser.add_argument("--name", required=True, help="任务名称")
+    parser.add_argument("--all", action="store_true", help="覆盖全部疾病")
+    parser.add_argument("--disease-ids", help="疾病ID列表, 用逗号隔开")
+    parser.add_argument("--department", help="所属科室")
+    parser.add_argument("--name-contains", help="疾病名称包含")
+    parser.add_argument("--repeat", type=int, default=1, help="每个疾病的重复次数")
+    parser.add_argument("--max-rounds", type=int, default=10, help="最大对话轮次")
+    parser.add_argument("--workers", type=int, default=APP_SETTINGS.EXECUTION_WORKERS, help="本进程的并发执行数, 0为只入队")
+    parser.add_argument("--report-interval", type=float, default=10, help="进度输出间隔(秒)")
+    asyncio.run(run_campaign(parser.parse_args()))
@@ -0,0 +1,59 @@
+import base64
+from datetime import datetime
+
+import orjson
+import pytest
+
+from app.core.crud import CRUDBase
+from app.core.exceptions import HTTPException
+from app.models.system import Log, LogType
+
+crud = CRUDBase(Log)
+
+
+def make_rows(count: int) -> list[dict]:
+    return [{"id": 100 - i, "log_type": LogType.ApiLog, "create_time": datetime(2025, 11, 20, 12, 0, i)} for i in range(count)]
+
+
+def test_keyset_order_appends_pk():
+    assert crud.keyset_order(["-create_time"]) == ["-create_time", "id"]
+    assert crud.keyset_order(["-id"]) == ["-id"]
+    assert crud.keyset_order([]) == ["id"]
+
+
+def test_cursor_round_trip():
+    rows = make_rows(10)
+    cursor = crud.next_cursor(rows, ["-id"], 10)
+    assert cursor is not None
+    assert "=" not in cursor
+    assert crud.cursor_values(cursor, ["-id"]) == [91]
+
+
+def test_cursor_round_trip_with_datetime_order():
+    rows = make_rows(5)
+    order = ["-create_time"]
+    cursor = crud.next_cursor(rows, order, 5)
+    values = crud.cursor_values(cursor, crud.keyset_order(order))
+    assert values == [rows[-1]["create_time"].isoformat(), rows[-1]["id"]]
+
+
+def test_no_cursor_for_last_page():
+    assert crud.next_cursor(make_rows(3), ["-id"], 10) is None
+    assert crud.next_cursor([], ["-id"], 10) is None
+
+
+def test_cursor_order_mismatch():
+    cursor = crud.next_cursor(make_rows(10), ["-id"], 10)
+    with pytest.raises(HTTPException):
+        crud.cursor_values(cursor, ["id"])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(orjson.dumps({"order": ["-id"]})).decode(),
+    base64.urlsafe_b64encode(orjson.dumps({"order": ["-id"], "values": [1, 2]})).decode(),
+])
+def test_invalid_cursor(cursor: str):
+    with pytest.raises(HTTPException):
+        crud.cursor_values(cursor, ["-id"])
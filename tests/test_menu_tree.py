@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from app.utils.menu_tree import assemble_tree
+
+
+def menu(menu_id: int, parent_id: int) -> SimpleNamespace:
+    return SimpleNamespace(id=menu_id, parent_id=parent_id)
+
+
+def make_node(m: SimpleNamespace) -> dict:
+    return {"id": m.id}
+
+
+def test_assemble_tree():
+    menus = [menu(1, 0), menu(2, 1), menu(3, 0), menu(4, 2), menu(5, 1)]
+    assert assemble_tree(menus, make_node) == [
+        {"id": 1, "children": [{"id": 2, "children": [{"id": 4}]}, {"id": 5}]},
+        {"id": 3},
+    ]
+
+
+def test_siblings_keep_input_order():
+    menus = [menu(3, 0), menu(1, 0), menu(2, 0)]
+    assert [node["id"] for node in assemble_tree(menus, make_node)] == [3, 1, 2]
+
+
+def test_orphans_are_dropped():
+    menus = [menu(1, 0), menu(2, 99), menu(3, 2)]
+    assert assemble_tree(menus, make_node) == [{"id": 1}]
+
+
+def test_leaf_children():
+    menus = [menu(1, 0), menu(2, 1)]
+    tree = assemble_tree(menus, make_node, make_leaf_children=lambda m: [{"button": m.id}])
+    assert tree == [{"id": 1, "children": [{"id": 2, "children": [{"button": 2}]}]}]
+
+
+def test_root_id():
+    menus = [menu(1, 0), menu(2, 1), menu(3, 1)]
+    assert assemble_tree(menus, make_node, root_id=1) == [{"id": 2}, {"id": 3}]
+    assert assemble_tree([], make_node) == []
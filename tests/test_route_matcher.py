@@ -0,0 +1,61 @@
+import pytest
+
+from app.utils.route_matcher import RouteMatcher, template_matcher
+
+TEMPLATES = [
+    "/api/v1/system-manage/roles",
+    "/api/v1/system-manage/roles/{role_id}",
+    "/api/v1/system-manage/roles/all/",
+    "/api/v1/system-manage/roles/{role_id}/menus",
+    "/api/v1/items/{item_id:int}/detail",
+    "/api/v1/items/{name}/owner",
+    "/static/{file_path:path}",
+]
+
+
+@pytest.fixture
+def matcher() -> RouteMatcher:
+    return RouteMatcher.from_templates(TEMPLATES)
+
+
+@pytest.mark.parametrize("path, template", [
+    ("/api/v1/system-manage/roles", "/api/v1/system-manage/roles"),
+    ("/api/v1/system-manage/roles/3", "/api/v1/system-manage/roles/{role_id}"),
+    ("/api/v1/system-manage/roles/all/", "/api/v1/system-manage/roles/all/"),
+    ("/api/v1/system-manage/roles/3/menus", "/api/v1/system-manage/roles/{role_id}/menus"),
+    ("/static/js/app.js", "/static/{file_path:path}"),
+])
+def test_match(matcher: RouteMatcher, path: str, template: str):
+    assert matcher.match(path) == template
+
+
+def test_static_segment_before_param(matcher: RouteMatcher):
+    assert matcher.match("/api/v1/system-manage/roles/all") == "/api/v1/system-manage/roles/{role_id}"
+    assert matcher.match("/api/v1/system-manage/roles/all/") == "/api/v1/system-manage/roles/all/"
+
+
+def test_params_with_different_convertors(matcher: RouteMatcher):
+    assert matcher.match("/api/v1/items/5/detail") == "/api/v1/items/{item_id:int}/detail"
+    assert matcher.match("/api/v1/items/5/owner") == "/api/v1/items/{name}/owner"
+    assert matcher.match("/api/v1/items/bag/owner") == "/api/v1/items/{name}/owner"
+    assert matcher.match("/api/v1/items/bag/detail") is None
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/system-manage",
+    "/api/v1/system-manage/roles/3/buttons",
+    "/api/v1/system-manage/roles//menus",
+    "/unknown",
+])
+def test_no_match(matcher: RouteMatcher, path: str):
+    assert matcher.match(path) is None
+
+
+def test_size_counts_distinct_templates():
+    matcher = RouteMatcher.from_templates([*TEMPLATES, TEMPLATES[0]])
+    assert matcher.size == len(TEMPLATES)
+
+
+def test_template_matcher():
+    assert template_matcher("/roles/{role_id}").match("/roles/1") == "/roles/{role_id}"
+    assert template_matcher("/roles/{role_id}").match("/roles") is None
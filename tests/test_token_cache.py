@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from app.core.token_cache import TokenCache
+
+
+@pytest.fixture
+def now(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    clock = [1_700_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    return clock
+
+
+def valid(exp: float | None) -> tuple:
+    return True, 0, {"data": {"userId": 1}, **({"exp": exp} if exp is not None else {})}
+
+
+def test_key_is_sha256_digest():
+    assert TokenCache.key("a") == TokenCache.key("a")
+    assert TokenCache.key("a") != TokenCache.key("b")
+    assert len(TokenCache.key("a")) == 32
+
+
+def test_valid_token_cached_until_exp(now: list[float]):
+    cache = TokenCache(max_size=8, negative_ttl=5)
+    key = cache.key("token")
+    cache.put(key, valid(now[0] + 60))
+    assert cache.get(key) == valid(now[0] + 60)
+
+    now[0] += 60
+    assert cache.get(key) is None
+    assert cache.stats() == {"size": 0, "hits": 1, "negativeHits": 0, "misses": 1, "evictions": 0}
+
+
+def test_token_without_exp_not_cached(now: list[float]):
+    cache = TokenCache(max_size=8, negative_ttl=5)
+    key = cache.key("token")
+    cache.put(key, valid(None))
+    assert cache.get(key) is None
+
+
+def test_invalid_token_cached_for_negative_ttl(now: list[float]):
+    cache = TokenCache(max_size=8, negative_ttl=5)
+    key = cache.key("bad")
+    result = (False, 4010, "Authentication failed, the token is invalid.")
+    cache.put(key, result)
+    assert cache.get(key) == result
+    assert cache.stats()["negativeHits"] == 1
+
+    now[0] += 5
+    assert cache.get(key) is None
+
+
+def test_lru_eviction(now: list[float]):
+    cache = TokenCache(max_size=2, negative_ttl=5)
+    keys = [cache.key(f"token-{i}") for i in range(3)]
+    cache.put(keys[0], valid(now[0] + 60))
+    cache.put(keys[1], valid(now[0] + 60))
+    assert cache.get(keys[0]) is not None  # keys[0]变为最近使用
+
+    cache.put(keys[2], valid(now[0] + 60))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+    assert cache.stats()["evictions"] == 1